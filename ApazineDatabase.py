@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import TYPE_CHECKING
+
+from CachedHelpers import NormalizePersonsName
+from LogQueue import Log, LogError
+
+if TYPE_CHECKING:
+    from FanacMailings import AllAPAs
+
+
+######################################################################
+# An SQLite database of the apazines and of Joe's info on the mailings, for queries which cut across the APA/mailing structure
+# of the model -- everything by an editor, all the mailings of a year, all the issues of a series, and so on.
+#
+# The tables are
+#   Mailings(APA, Number, Year, Month, Date, Editor, EditorKey, Issues, Pages)        one row per mailing
+#   Apazines(APA, Mailing, IssueName, Series, SeriesName, DisplayName, DirURL, PageName, FIS, Locale, PageCount, Pages, Editor, EditorKey, TagList)
+#                                                                                       one row per apazine in a mailing
+#   Meta(Key, Value)                                                                    the schema version and the fingerprint of the model
+# EditorKey is the editor's name normalized by NormalizePersonsName, so it can be matched however the name was written.
+#
+# ExportApazineDatabase() writes the database.  ApazineDatabase opens it read-only and answers the common queries.
+# Bump ApazineDatabaseVersion whenever the schema changes.
+ApazineDatabaseVersion=1
+
+Schema="""
+CREATE TABLE Meta (Key TEXT PRIMARY KEY, Value TEXT);
+CREATE TABLE Mailings (APA TEXT, Number TEXT, Year INTEGER, Month INTEGER, Date TEXT, Editor TEXT, EditorKey TEXT,
+                       Issues INTEGER, Pages INTEGER, PRIMARY KEY (APA, Number));
+CREATE TABLE Apazines (APA TEXT, Mailing TEXT, IssueName TEXT, Series TEXT, SeriesName TEXT, DisplayName TEXT, DirURL TEXT, PageName TEXT,
+                       FIS TEXT, Locale TEXT, PageCount TEXT, Pages INTEGER, Editor TEXT, EditorKey TEXT, TagList TEXT);
+CREATE INDEX ApazinesByMailing ON Apazines (APA, Mailing);
+CREATE INDEX ApazinesByEditor ON Apazines (EditorKey);
+CREATE INDEX ApazinesBySeries ON Apazines (Series);
+CREATE INDEX ApazinesByDirURL ON Apazines (DirURL);
+CREATE INDEX MailingsByYear ON Mailings (Year);
+CREATE INDEX MailingsByEditor ON Mailings (EditorKey);
+"""
+
+
+# Write the model to the database, replacing what is there.
+# If the database already holds a model with the same fingerprint, it is left alone.  Returns True if the database was written.
+def ExportApazineDatabase(filename: str, allAPAs: AllAPAs) -> bool:
+    fingerprint=allAPAs.Fingerprint()
+    if DatabaseFingerprint(filename) == fingerprint:
+        Log(f"The apazine database {filename} is up to date")
+        return False
+
+    tempname=filename+".tmp"
+    if os.path.exists(tempname):
+        os.remove(tempname)
+    try:
+        db=sqlite3.connect(tempname)
+        try:
+            with db:
+                db.executescript(Schema)
+                db.executemany("INSERT INTO Meta VALUES (?, ?)", [("Version", str(ApazineDatabaseVersion)), ("Fingerprint", fingerprint)])
+                db.executemany("INSERT INTO Mailings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               ((apa.Name, mailing.Number, mailing.MIFJ.Year, mailing.MIFJ.Month, str(mailing.MIFJ.Date),
+                                 mailing.MIFJ.Editor, NormalizePersonsName(mailing.MIFJ.Editor), mailing.Count.Issues, mailing.Count.Pages)
+                                for apa in allAPAs for mailing in apa))
+                db.executemany("INSERT INTO Apazines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               ((apa.Name, mailing.Number, x.IssueName, x.Series, x.SeriesName, x.DisplayName, x.DirURL, x.PageName,
+                                 x.FIS, x.Locale, x.PageCount, x.Pages, x.Editor, NormalizePersonsName(x.Editor), x.TagList)
+                                for apa in allAPAs for mailing in apa for x in mailing))
+        finally:
+            db.close()
+        os.replace(tempname, filename)
+    except (sqlite3.Error, OSError) as e:
+        LogError(f"Could not write the apazine database {filename}: {e}")
+        return False
+    Log(f"Apazine database written to {filename}")
+    return True
+
+
+# The fingerprint of the model in an existing database, or None if there isn't a usable one
+def DatabaseFingerprint(filename: str) -> str | None:
+    if not os.path.exists(filename):
+        return None
+    try:
+        db=sqlite3.connect(f"file:{filename}?mode=ro", uri=True)
+        try:
+            meta=dict(db.execute("SELECT Key, Value FROM Meta").fetchall())
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return None
+    if meta.get("Version") != str(ApazineDatabaseVersion):
+        return None
+    return meta.get("Fingerprint")
+
+
+######################################################################
+# Read-only access to a database written by ExportApazineDatabase()
+# The rows returned are sqlite3.Rows, which can be indexed by column name (e.g., row["IssueName"])
+class ApazineDatabase:
+    def __init__(self, filename: str):
+        self._db: sqlite3.Connection=sqlite3.connect(f"file:{filename}?mode=ro", uri=True)
+        self._db.row_factory=sqlite3.Row
+
+    def __enter__(self) -> ApazineDatabase:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.Close()
+
+    def Close(self) -> None:
+        self._db.close()
+
+    # Run any query
+    def Query(self, sql: str, parameters: tuple | dict=()) -> list[sqlite3.Row]:
+        return self._db.execute(sql, parameters).fetchall()
+
+    # The apazines in a mailing
+    def Mailing(self, apaName: str, number: str) -> list[sqlite3.Row]:
+        return self.Query("SELECT * FROM Apazines WHERE APA = ? AND Mailing = ?", (apaName, number))
+
+    # The apazines edited by someone, in APA and mailing order
+    def ByEditor(self, editor: str) -> list[sqlite3.Row]:
+        return self.Query("SELECT Apazines.*, Mailings.Year, Mailings.Month FROM Apazines "
+                          "LEFT JOIN Mailings ON Apazines.APA = Mailings.APA AND Apazines.Mailing = Mailings.Number "
+                          "WHERE Apazines.EditorKey = ? ORDER BY Apazines.APA, Mailings.Year, Mailings.Month", (NormalizePersonsName(editor),))
+
+    # The apazines of a series (as named in FanacAnalyzer's Series column)
+    def BySeries(self, series: str) -> list[sqlite3.Row]:
+        return self.Query("SELECT * FROM Apazines WHERE Series = ?", (series,))
+
+    # The apazines from a directory of fanac.org
+    def ByDirURL(self, dirURL: str) -> list[sqlite3.Row]:
+        return self.Query("SELECT * FROM Apazines WHERE DirURL = ?", (dirURL,))
+
+    # The mailings (of all APAs) of a year
+    def MailingsInYear(self, year: int) -> list[sqlite3.Row]:
+        return self.Query("SELECT * FROM Mailings WHERE Year = ? ORDER BY Month, APA", (year,))
+
+    # The mailings an editor was OE of
+    def MailingsByEditor(self, editor: str) -> list[sqlite3.Row]:
+        return self.Query("SELECT * FROM Mailings WHERE EditorKey = ? ORDER BY Year, Month", (NormalizePersonsName(editor),))
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+# Microbenchmark: MailingSpecParser vs. the old per-APA regex loop for matching the Mailings column of the FanacAnalyzer CSV
+# Usage:  python Benchmarks/BenchMailingSpecs.py [rows]
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HelpersPackage import SplitOnAnySingleChar
+from FanacMailings import MailingSpecParser
+
+
+KnownApas=["ANZAPA", "APA-L", "FAPA", "FLAP", "FWD", "KAPA", "OMPA", "SAPS", "SFPA", "VAPA", "WOOF", "N'APA", "Cult", "TAPS"]
+
+
+# Make a synthetic Mailings column: mostly single mailings, some joint ones, and a few APAs we don't know about
+def MakeMailingsColumn(rows: int, seed: int=1) -> list[str]:
+    rand=random.Random(seed)
+    apas=KnownApas+["Unknown APA"]
+    column=[]
+    for _ in range(rows):
+        specs=[f"{rand.choice(apas)} {rand.randint(1, 400)}" for _ in range(1 if rand.random() < 0.85 else 2)]
+        column.append(f"['{' & '.join(specs)}']")
+    return column
+
+
+# The matching loop as it was before MailingSpecParser
+def LegacyParse(mailings: str, knownApas: list[str]) -> list[tuple[str, str]]:
+    specs=[]
+    mailings=mailings.removeprefix("['").removesuffix("']")
+    mailings=[x.strip() for x in SplitOnAnySingleChar("&,",mailings)]
+    for mailing in mailings:
+        for apaName in knownApas:
+            m=re.match(rf"{apaName}\s(.*)$", mailing)
+            if m is not None:
+                specs.append((apaName, m.groups()[0]))
+                break
+    return specs
+
+
+def main():
+    rows=int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    column=MakeMailingsColumn(rows)
+
+    parser=MailingSpecParser(KnownApas)
+    # The two must agree (there are no prefix-ambiguous names in KnownApas)
+    assert all([LegacyParse(x, KnownApas) == parser.Parse(x) for x in column[:1000]])
+
+    legacy=min(timeit.repeat(lambda: [LegacyParse(x, KnownApas) for x in column], number=1, repeat=3))
+    compiled=min(timeit.repeat(lambda: [parser.Parse(x) for x in column], number=1, repeat=3))
+
+    print(f"{rows:,} Mailings values, {len(KnownApas)} known APAs")
+    print(f"  per-APA regex loop:   {legacy:8.3f} sec   ({legacy/rows*1e6:6.2f} usec/row)")
+    print(f"  MailingSpecParser:    {compiled:8.3f} sec   ({compiled/rows*1e6:6.2f} usec/row)")
+    print(f"  speedup:              {legacy/compiled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+# Measure the memory taken by the model: the CSV is ingested and Joe's info merged with tracemalloc running, and the memory
+# still allocated at the end is reported per fanzine filed (i.e., per FanzineInMailing) and broken down by the source lines
+# which allocated most of it.
+# The same measurement is made of a baseline version of FanacMailings, extracted from git, for comparison.  By default this is
+# the version from before the model was compacted (__slots__, interning and the shared NoJoeData), so the figures show what that saved.
+# Each version is measured in a fresh interpreter, on its own copy of the same synthetic inputs.
+# Usage:  python Benchmarks/BenchMemory.py [--apas N] [--mailings N] [--contributions N] [--top N] [--baseline REV | --no-baseline]
+
+import argparse
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from SyntheticInputs import MakeInputs
+
+RepoDir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Measure the model built by the FanacMailings in tree from the inputs in directory
+def Measure(tree: str, directory: str, top: int) -> dict:
+    sys.path.insert(0, tree)
+    from Settings import Settings
+    from Log import LogOpen
+    from FanacMailings import ReadXLSX, IngestCSV, MergeJoeData, CountAPAs
+
+    os.chdir(directory)
+    LogOpen("log.txt", "log-ERRORS.txt")
+    Settings().Load("FanacMailings settings.txt", MustExist=True, SuppressMessageBox=True)
+    knownApas=[x.strip() for x in Settings().Get("Known APAs").split(",")]
+    mailingsInfoTablefromJoe=ReadXLSX(knownApas)
+
+    gc.collect()
+    tracemalloc.start(1)
+    before=tracemalloc.take_snapshot()
+    allAPAs=IngestCSV(Settings().Get("CSVSource"), knownApas)
+    MergeJoeData(allAPAs, mailingsInfoTablefromJoe)
+    CountAPAs(allAPAs)
+    gc.collect()
+    size, peak=tracemalloc.get_traced_memory()
+    after=tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    lines=[(stat.size_diff, f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}") for stat in after.compare_to(before, "lineno")[:top]]
+    return {"Fanzines": sum([len(mailing) for apa in allAPAs for mailing in apa]), "Mailings": sum([len(apa) for apa in allAPAs]),
+            "Size": size, "Peak": peak, "Lines": lines}
+
+
+# Run Measure() on tree in a fresh interpreter, with inputs of its own, and return its results
+def MeasureInSubprocess(tree: str, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        MakeInputs(directory, args.apas, args.mailings, args.contributions)
+        result=subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", tree, directory, "--top", str(args.top)],
+                              capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Measuring {tree} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+# The commit before the model was compacted: the parent of the one which introduced the shared NoJoeData
+def DefaultBaseline() -> str:
+    commits=subprocess.run(["git", "log", "-SNoJoeData=MailingInfoFromJoe()", "--format=%H", "--reverse", "--", "FanacMailings.py"],
+                           cwd=RepoDir, capture_output=True, text=True, check=True).stdout.split()
+    if len(commits) == 0:
+        raise RuntimeError("Could not find the commit which compacted the model: use --baseline")
+    return commits[0]+"^"
+
+
+# Extract the tree of git revision rev into directory
+def ExtractRevision(rev: str, directory: str) -> None:
+    archive=subprocess.run(["git", "archive", "--format=tar", rev], cwd=RepoDir, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory, filter="data")
+
+
+def Report(name: str, results: dict) -> None:
+    fanzines=results["Fanzines"]
+    print(f"{name}:")
+    print(f"  Model:          {results['Size']/1024:10.0f} KiB  ({results['Size']/fanzines:.0f} bytes per fanzine)")
+    print(f"  Peak:           {results['Peak']/1024:10.0f} KiB  ({results['Peak']/fanzines:.0f} bytes per fanzine)")
+    print("  Largest allocations:")
+    for size, line in results["Lines"]:
+        print(f"    {size/1024:10.0f} KiB  {size/fanzines:6.0f} bytes/fanzine  {line}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        # (The subprocess run by MeasureInSubprocess())
+        print(json.dumps(Measure(sys.argv[2], sys.argv[3], int(sys.argv[5]))))
+        return
+
+    parser=argparse.ArgumentParser(description="Measure the memory taken by the FanacMailings model on synthetic data")
+    parser.add_argument("--apas", type=int, default=5)
+    parser.add_argument("--mailings", type=int, default=200)
+    parser.add_argument("--contributions", type=int, default=25)
+    parser.add_argument("--top", type=int, default=8, help="the number of allocating lines to list")
+    parser.add_argument("--baseline", help="the git revision to compare with (the default is the one before the model was compacted)")
+    parser.add_argument("--no-baseline", action="store_true", help="just measure the current version")
+    args=parser.parse_args()
+
+    current=MeasureInSubprocess(RepoDir, args)
+    print(f"{args.apas} APAs x {args.mailings} mailings x {args.contributions} contributions: "
+          f"{current['Fanzines']} fanzines filed in {current['Mailings']} mailings")
+    Report("Current", current)
+    if args.no_baseline:
+        return
+
+    baseline=args.baseline if args.baseline is not None else DefaultBaseline()
+    with tempfile.TemporaryDirectory() as tree:
+        ExtractRevision(baseline, tree)
+        old=MeasureInSubprocess(tree, args)
+    Report(f"Baseline ({baseline})", old)
+    print(f"Current model is {current['Size']/old['Size']:.2f}x the baseline's: "
+          f"{old['Size']/old['Fanzines']:.0f} --> {current['Size']/current['Fanzines']:.0f} bytes per fanzine")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+# Time each stage of FanacMailings' main() on synthetic inputs (see SyntheticInputs.py) and write the results to a JSON file
+# so that they can be compared between commits.
+# Each stage is timed separately, and the whole pipeline is run --repeat times, keeping each stage's best time.
+# Usage:  python Benchmarks/BenchStages.py [--apas N] [--mailings N] [--contributions N] [--repeat N] [--output file.json]
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Settings import Settings
+from Log import LogOpen
+from SyntheticInputs import MakeInputs
+from FanacMailings import ReadTemplate, CompileMailingTemplate, CompileApaTemplate, CompileAllApasTemplate, ReadXLSX, XLSXCacheName
+from FanacMailings import IngestCSV, MergeJoeData, CountAPAs, RenderMailingPage, RenderApaPage, RenderAllApasPage
+from PageWriter import WritePage
+
+RepoDir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Times the stages of one run of the pipeline
+class StageTimer:
+    def __init__(self):
+        self.Times: dict[str, float]={}
+        self._start: float=time.perf_counter()
+
+    # Record the time since the last stage ended as the time for this one
+    def Stage(self, name: str) -> None:
+        now=time.perf_counter()
+        self.Times[name]=now-self._start
+        self._start=now
+
+    # Don't count the time since the last stage ended
+    def Skip(self) -> None:
+        self._start=time.perf_counter()
+
+
+# Run the pipeline once in the current directory (which holds the inputs) and return the time each stage took
+def RunPipeline() -> tuple[dict[str, float], dict[str, int]]:
+    timer=StageTimer()
+
+    Settings().Load("FanacMailings settings.txt", MustExist=True, SuppressMessageBox=True)
+    knownApas=[x.strip() for x in Settings().Get("Known APAs").split(",")]
+    templateMailing=ReadTemplate("Template-Mailing", "", "mailing", CompileMailingTemplate)
+    templateApa=ReadTemplate("Template-APA", "", "APA", CompileApaTemplate)
+    templateAllApas=ReadTemplate("Template-allAPAs", "", "all APAs", CompileAllApasTemplate)
+    timer.Stage("Settings and template load")
+
+    if os.path.exists(XLSXCacheName("APA Mailings.xlsx")):
+        os.remove(XLSXCacheName("APA Mailings.xlsx"))
+    timer.Skip()
+    ReadXLSX(knownApas)
+    timer.Stage("xlsx read")
+    mailingsInfoTablefromJoe=ReadXLSX(knownApas)
+    timer.Stage("xlsx read (cached)")
+
+    allAPAs=IngestCSV(Settings().Get("CSVSource"), knownApas)
+    timer.Stage("CSV ingest")
+
+    MergeJoeData(allAPAs, mailingsInfoTablefromJoe)
+    timer.Stage("Joe-data merge")
+
+    CountAPAs(allAPAs)
+    timer.Stage("Count aggregation")
+
+    allAPAs.sort()
+    for apa in allAPAs:
+        apa.sort()
+        for mailing in apa:
+            mailing.sort()
+    timer.Stage("Sort")
+
+    updated=f"Updated {datetime.datetime.now().strftime('%m/%d/%Y, %H:%M:%S')}"
+    mailingPages=[(apa.Name, mailing.Number, RenderMailingPage(templateMailing, apa.Name, mailing, apa.prevIndex(mailing.Number), apa.nextIndex(mailing.Number), updated))
+                  for apa in allAPAs for mailing in apa]
+    apaPages=[(apa.Name, RenderApaPage(templateApa, apa, None, updated)) for apa in allAPAs]
+    allApasPage=RenderAllApasPage(templateAllApas, allAPAs, updated)
+    timer.Stage("Rendering")
+
+    # WritePage() leaves alone a page which is unchanged apart from its timestamp, so the last run's pages are deleted first:
+    # otherwise every run after the first would time reading and comparing the pages, not writing them.
+    reportsdir=Settings().Get("ReportsDir")
+    shutil.rmtree(reportsdir, ignore_errors=True)
+    timer.Skip()
+    for apa in allAPAs:
+        os.makedirs(os.path.join(reportsdir, apa.Name), exist_ok=True)
+    for apaName, number, page in mailingPages:
+        WritePage(os.path.join(reportsdir, apaName, number)+".html", page)
+    for apaName, page in apaPages:
+        WritePage(os.path.join(reportsdir, apaName, "index.html"), page)
+    WritePage(os.path.join(reportsdir, "index.html"), allApasPage)
+    timer.Stage("File writing")
+
+    volume={"Fanzines filed": sum([len(mailing) for apa in allAPAs for mailing in apa]),
+            "Mailing pages": len(mailingPages),
+            "Bytes rendered": sum([len(x[2]) for x in mailingPages])+sum([len(x[1]) for x in apaPages])+len(allApasPage)}
+    return timer.Times, volume
+
+
+def GitCommit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RepoDir, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser=argparse.ArgumentParser(description="Time each stage of FanacMailings on synthetic data")
+    parser.add_argument("--apas", type=int, default=5)
+    parser.add_argument("--mailings", type=int, default=200)
+    parser.add_argument("--contributions", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="BenchStages.json", help="the JSON file the results are written to")
+    args=parser.parse_args()
+    output=os.path.abspath(args.output)
+
+    best: dict[str, float]={}
+    volume: dict[str, int]={}
+    cwd=os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        MakeInputs(directory, args.apas, args.mailings, args.contributions)
+        os.chdir(directory)
+        try:
+            LogOpen("log.txt", "log-ERRORS.txt")
+            for _ in range(args.repeat):
+                times, volume=RunPipeline()
+                for stage, seconds in times.items():
+                    best[stage]=min(seconds, best.get(stage, seconds))
+        finally:
+            os.chdir(cwd)
+
+    results={"Commit": GitCommit(), "Date": datetime.datetime.now().isoformat(timespec="seconds"),
+             "Python": platform.python_version(), "Platform": platform.platform(),
+             "Size": {"APAs": args.apas, "Mailings per APA": args.mailings, "Contributions per mailing": args.contributions, "Repeat": args.repeat},
+             "Volume": volume,
+             "Stages": best,
+             "Total": sum(best.values())}
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    print(f"{args.apas} APAs x {args.mailings} mailings x {args.contributions} contributions, best of {args.repeat}")
+    for stage, seconds in best.items():
+        print(f"  {stage+':':28}{seconds*1000:10.1f} msec")
+    print(f"  {'Total:':28}{results['Total']*1000:10.1f} msec")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
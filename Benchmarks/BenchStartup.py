@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+# Measure FanacMailings' startup: the wall time from launching it to its reading the first byte of its input data
+# (the model snapshot, the CSV or Joe's spreadsheet), compared with the time to launch a bare interpreter.
+# FanacMailings is run on synthetic inputs (see SyntheticInputs.py) and stopped as soon as it opens its first input.
+# It is then run again under -X importtime, and the modules which took longest to import at startup are listed.
+# Usage:  python Benchmarks/BenchStartup.py [--repeat N] [--top N]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from SyntheticInputs import MakeInputs
+
+RepoDir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run FanacMailings, but exit the moment it opens one of its inputs, writing the time that happened to stderr
+Driver="""
+import builtins, os, runpy, sys, time
+inputs={"FanacAnalyzer.csv", "APA Mailings.xlsx", "APA Mailings.xlsx.cache", "FanacMailings model.snapshot"}
+builtinOpen=builtins.open
+def Open(file, *args, **kwargs):
+    if isinstance(file, str) and os.path.basename(file) in inputs:
+        sys.stderr.write(f"First input {time.time()}\\n")
+        sys.stderr.flush()
+        os._exit(0)
+    return builtinOpen(file, *args, **kwargs)
+builtins.open=Open
+sys.argv=["FanacMailings.py"]
+sys.path.insert(0, REPO)
+runpy.run_path(os.path.join(REPO, "FanacMailings.py"), run_name="__main__")
+"""
+
+
+# Launch python with args in directory and return the wall time until it exits, and what it wrote to stderr
+def Launch(args: list[str], directory: str) -> tuple[float, float, str]:
+    start=time.time()
+    result=subprocess.run([sys.executable]+args, cwd=directory, capture_output=True, text=True)
+    return start, time.time(), result.stderr
+
+
+# The time from launching FanacMailings to its opening its first input
+def TimeToFirstInput(directory: str) -> float:
+    start, _, stderr=Launch(["-c", Driver.replace("REPO", repr(RepoDir))], directory)
+    for line in stderr.splitlines():
+        if line.startswith("First input "):
+            return float(line.removeprefix("First input "))-start
+    raise RuntimeError(f"FanacMailings didn't open its input:\n{stderr}")
+
+
+# The cumulative import time (in seconds) of each top-level import made at startup, from -X importtime
+def ImportTimes(directory: str) -> dict[str, float]:
+    _, _, stderr=Launch(["-X", "importtime", "-c", Driver.replace("REPO", repr(RepoDir))], directory)
+    times={}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name=line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):     # Top-level imports are indented by just one space
+            times[name.strip()]=int(cumulative)/1e6
+    return times
+
+
+def main():
+    parser=argparse.ArgumentParser(description="Measure how long FanacMailings takes to start up")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="the number of slowest imports to list")
+    args=parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        MakeInputs(directory, 2, 10, 5)
+        # The first run of each compiles the .pyc files, so it isn't counted
+        Launch(["-c", "pass"], directory)
+        TimeToFirstInput(directory)
+        interpreter=min([x[1]-x[0] for x in [Launch(["-c", "pass"], directory) for _ in range(args.repeat)]])
+        firstInput=min([TimeToFirstInput(directory) for _ in range(args.repeat)])
+        imports=ImportTimes(directory)
+
+    print(f"Best of {args.repeat}:")
+    print(f"  {'Bare interpreter:':36}{interpreter*1000:8.1f} msec")
+    print(f"  {'FanacMailings to first input byte:':36}{firstInput*1000:8.1f} msec  ({(firstInput-interpreter)*1000:.1f} msec more)")
+    print(f"Slowest imports at startup (cumulative, -X importtime):")
+    for name, seconds in sorted(imports.items(), key=lambda x: -x[1])[:args.top]:
+        print(f"  {name+':':36}{seconds*1000:8.1f} msec")
+
+
+if __name__ == "__main__":
+    main()
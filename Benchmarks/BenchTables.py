@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+# Benchmark the table building in page rendering: a synthetic 10,000-contribution mailing page and a 2,000-mailing APA page.
+# The tables are built both the current way (a list joined once for the mailing table, TableBuilder for the APA rows) and with the old
+# build-by-repeated-string-concatenation code, and the whole pages are timed too.
+# Usage:  python Benchmarks/BenchTables.py [contributions] [mailings]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HelpersPackage import FormatLink, UnicodeToHtml, MakeFancyLink
+from FanacMailings import FanzineInMailing, OneMailing, EntireAPA, Counts, MailingInfoFromJoe
+from FanacMailings import CompileMailingTemplate, CompileApaTemplate, RenderMailingPage, RenderApaPage, MailingTable, ApaTableRows
+
+RepoDir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+Editors=["Bob Tucker", "Lee Hoffman", "Harry Warner, Jr.", "Redd Boggs", "F. Towner Laney", "Francis T. Laney", "Jack Speer"]
+
+
+def MakeMailing(contributions: int) -> OneMailing:
+    mailing=OneMailing()
+    mailing.Number="100"
+    mailing.MIFJ=MailingInfoFromJoe(Number="100", Year="1952", Month="3", Editor="Redd Boggs")
+    for i in range(contributions):
+        mailing.append(FanzineInMailing(IssueName=f"Fanzine {i%500} #{i}", DirURL=f"https://fanac.org/fanzines/Fanzine{i%500}",
+                                        PageName=f"Fanzine{i%500}-{i}.pdf", PageCount=str(i%30+1), Editor=Editors[i%len(Editors)]))
+    mailing.Count=Counts(Issues=contributions, Pages=sum([i%30+1 for i in range(contributions)]))
+    return mailing
+
+
+def MakeApa(mailings: int) -> EntireAPA:
+    apa=EntireAPA(Name="FAPA")
+    for i in range(1, mailings+1):
+        mailing=apa[str(i)]
+        mailing.MIFJ=MailingInfoFromJoe(Number=str(i), Year=str(1937+i//4), Month=str(i%12+1), Editor=Editors[i%len(Editors)])
+        mailing.Count=Counts(Issues=i%40+1, Pages=(i%40+1)*9)
+        apa.Count+=Counts(Mailings=1, Issues=mailing.Count.Issues, Pages=mailing.Count.Pages)
+    return apa
+
+
+# The mailing table as it was built before TableBuilder
+def LegacyMailingTable(mailing: OneMailing) -> str:
+    newtable="<tr>\n"
+    newtable+="<th>Contribution</th>\n"
+    newtable+="<th>Editor</th>\n"
+    newtable+="<th>Pages</th>\n"
+    newtable+="</tr>\n"
+    for apazine in mailing:
+        newtable+="<tr>\n"
+        if apazine.DirURL != "" and apazine.PageName != "":
+            if apazine.PageName.startswith("//fanac.org"):
+                href=apazine.PageName
+            else:
+                href=f"{apazine.DirURL}/{apazine.PageName}"
+            href=href.replace(" ", "%20")
+            newtable+=f"<td>{FormatLink(href, UnicodeToHtml(apazine.IssueName))}</td>\n"
+        else:
+            newtable+=f"<td>&nbsp;</td>\n"
+        if apazine.Editor != "":
+            newtable+=f"<td>{MakeFancyLink(apazine.Editor)}&nbsp;&nbsp;</td>"
+        else:
+            newtable+=f"<td>&nbsp;</td>\n"
+        if apazine.PageCount != "":
+            newtable+=f"<td>{apazine.PageCount}</td>\n"
+        else:
+            newtable+=f"<td>&nbsp;</td>\n"
+        newtable+="</tr>\n"
+    return newtable.replace("\\", "/")
+
+
+# The APA page rows as they were built before TableBuilder
+def LegacyApaRows(apa: EntireAPA) -> str:
+    rows=""
+    for mailing in apa:
+        rows+=(f"\n<tr><td>{FormatLink(mailing.Number+".html", mailing.Number)}</td>"
+               f"<td>{mailing.MIFJ.Date}</td><td>{mailing.MIFJ.Editor}</td>"
+               f"<td style='text-align: right'>{mailing.Count.Issues}&nbsp;&nbsp;&nbsp;&nbsp;</td>"
+               f"<td style='text-align: right'>{mailing.Count.Pages}&nbsp;&nbsp;&nbsp;&nbsp;</td>"
+               f"</tr>")
+    return rows
+
+
+def Time(fn) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=5))
+
+
+def main():
+    contributions=int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    mailings=int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    with open(os.path.join(RepoDir, "Template - Mailing.html"), "r") as file:
+        templateMailing=CompileMailingTemplate(file.read())
+    with open(os.path.join(RepoDir, "Template - APA.html"), "r") as file:
+        templateApa=CompileApaTemplate(file.read())
+
+    mailing=MakeMailing(contributions)
+    apa=MakeApa(mailings)
+    updated="Updated 01/01/2000, 00:00:00"
+
+    # Both ways must produce the same table.  (Apart from whitespace: the new code ends every cell with a newline, where the old code missed one.)
+    assert LegacyMailingTable(mailing).replace("\n", "") == MailingTable(mailing).replace("\n", "")
+    assert LegacyApaRows(apa) == ApaTableRows(apa)
+
+    print(f"Mailing page with {contributions:,} contributions")
+    print(f"  table by string +=:    {Time(lambda: LegacyMailingTable(mailing))*1000:8.2f} msec")
+    print(f"  table by list and join:{Time(lambda: MailingTable(mailing))*1000:8.2f} msec")
+    print(f"  whole page:            {Time(lambda: RenderMailingPage(templateMailing, "FAPA", mailing, "99", "101", updated))*1000:8.2f} msec")
+    print(f"APA page with {mailings:,} mailings")
+    print(f"  rows by string +=:     {Time(lambda: LegacyApaRows(apa))*1000:8.2f} msec")
+    print(f"  rows by TableBuilder:  {Time(lambda: ApaTableRows(apa))*1000:8.2f} msec")
+    print(f"  whole page:            {Time(lambda: RenderApaPage(templateApa, apa, None, updated))*1000:8.2f} msec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+# Generate a synthetic set of FanacMailings inputs in a directory:
+#   a CSV in FanacAnalyzer's column layout, a matching multi-sheet "APA Mailings.xlsx", the three page templates,
+#   a bumpf file and a "FanacMailings settings.txt" pointing at them all (with the output going to <directory>/Reports)
+# The size is set by the number of APAs, mailings per APA and contributions per mailing.  The same seed always generates the same files.
+# Usage:  python Benchmarks/SyntheticInputs.py directory [apas] [mailings] [contributions]
+
+import csv
+import os
+import random
+import shutil
+import sys
+
+import openpyxl
+
+RepoDir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ApaNames=["FAPA", "SAPS", "VAPA", "OMPA", "FLAP", "APA-L", "ANZAPA", "SFPA", "KAPA", "FAPA Extra", "N'APA", "TAPS", "WOOF", "Cult"]
+Editors=["Bob Tucker", "Lee Hoffman", "Harry Warner, Jr.", "Redd Boggs", "F. Towner Laney", "Jack Speer", "Elmer Perdue", "Bill Rotsler"]
+Months=["January", "March", "May", "July", "September", "November"]
+CSVColumns=["IssueName", "Series", "SeriesName", "DisplayName", "DirURL", "PageName", "FIS", "Locale", "PageCount", "Editor", "TagList", "Mailings"]
+
+
+# The names of n APAs: the real ones first, then made-up ones
+def MakeApaNames(n: int) -> list[str]:
+    return (ApaNames+[f"APA{i}" for i in range(len(ApaNames), n)])[:n]
+
+
+# Generate the inputs and return the names of the APAs
+def MakeInputs(directory: str, apas: int=5, mailings: int=100, contributions: int=20, seed: int=1) -> list[str]:
+    rand=random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    apaNames=MakeApaNames(apas)
+
+    # The CSV has one row per fanzine issue.  About one in ten was also distributed through a mailing of a second APA.
+    with open(os.path.join(directory, "FanacAnalyzer.csv"), "w", newline="", encoding="utf-8") as file:
+        writer=csv.writer(file)
+        writer.writerow(CSVColumns)
+        for apaName in apaNames:
+            for mailing in range(1, mailings+1):
+                for i in range(contributions):
+                    series=rand.randrange(500)
+                    spec=f"{apaName} {mailing}"
+                    if rand.random() < 0.1:
+                        spec+=f" & {rand.choice(apaNames)} {rand.randint(1, mailings)}"
+                    pages=str(rand.randint(1, 40)) if rand.random() < 0.95 else ""
+                    editor=rand.choice(Editors) if rand.random() < 0.97 else ""
+                    writer.writerow([f"Fanzine {series} #{mailing}-{i}", f"Fanzine{series}", f"Fanzine {series}", "",
+                                     f"https://fanac.org/fanzines/Fanzine{series}", f"Fanzine{series}-{mailing}-{i}.pdf", "",
+                                     "US", pages, editor, "", f"['{spec}']"])
+
+    # Joe's spreadsheet has a sheet per APA listing the date and OE of each mailing, plus a sheet we don't care about
+    wb=openpyxl.Workbook()
+    wb.remove(wb.active)
+    for apaName in apaNames:
+        ws=wb.create_sheet(apaName)
+        ws.append(["Mailing", "Month", "Year", "OE"])
+        for mailing in range(1, mailings+1):
+            ws.append([mailing, rand.choice(Months), 1937+mailing//4, rand.choice(Editors)])
+    wb.create_sheet("Notes").append(["Notes"])
+    wb.save(os.path.join(directory, "APA Mailings.xlsx"))
+
+    for template in ["Template - Mailing.html", "Template - APA.html", "Template - All APAs.html"]:
+        shutil.copy(os.path.join(RepoDir, template), directory)
+    with open(os.path.join(directory, f"{apaNames[0]}-bumpf.txt"), "w") as file:
+        file.write(f"{apaNames[0]} is a synthetic APA.")
+
+    with open(os.path.join(directory, "FanacMailings settings.txt"), "w") as file:
+        file.write(f"Known APAs={', '.join(apaNames)}\n"
+                   "CSVSource=FanacAnalyzer.csv\n"
+                   "ReportsDir=Reports\n"
+                   "Template-Mailing=Template - Mailing.html\n"
+                   "Template-APA=Template - APA.html\n"
+                   "Template-allAPAs=Template - All APAs.html\n")
+    return apaNames
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage:  python Benchmarks/SyntheticInputs.py directory [apas] [mailings] [contributions]")
+        return
+    apas=int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    mailings=int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    contributions=int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    MakeInputs(sys.argv[1], apas, mailings, contributions)
+    print(f"Generated {apas} APAs x {mailings} mailings x {contributions} contributions in {sys.argv[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import functools
+
+from LazyImport import LazyModule
+from LogQueue import Log
+
+HelpersPackage=LazyModule("HelpersPackage")
+
+
+######################################################################
+# Memoized versions of the pure helpers from HelpersPackage which the ingest and render loops call over and over on the same values:
+# editors, DirURLs and mailing numbers repeat heavily across mailings and APAs.  (SortTitle() isn't here: each apazine's sort key
+# is computed just once anyway and kept on it, so a cache of them would never be hit.)
+# Each is a bounded LRU cache, so a very large run can't grow them without limit.  (Each worker process has its own.)
+#
+# Import these from here rather than from HelpersPackage.  LogHelperCacheStats() logs how well the caches are doing.
+
+HelperCacheSize=4096
+
+# A memoized HelpersPackage function.  (HelpersPackage itself is only loaded when the first call misses.)
+def CachedHelper(name: str):
+    @functools.lru_cache(maxsize=HelperCacheSize)
+    def Helper(*args, **kwargs):
+        return getattr(HelpersPackage, name)(*args, **kwargs)
+    Helper.__name__=Helper.__qualname__=name
+    return Helper
+
+NormalizePersonsName=CachedHelper("NormalizePersonsName")
+MakeFancyLink=CachedHelper("MakeFancyLink")
+FormatLink=CachedHelper("FormatLink")
+SortMessyNumber=CachedHelper("SortMessyNumber")
+
+CachedHelpers={"NormalizePersonsName": NormalizePersonsName, "MakeFancyLink": MakeFancyLink, "FormatLink": FormatLink,
+               "SortMessyNumber": SortMessyNumber}
+
+
+# The hits and misses of each cache: helper name --> {"Hits": n, "Misses": n, "Size": n}
+def HelperCacheStats() -> dict[str, dict[str, int]]:
+    stats={}
+    for name, helper in CachedHelpers.items():
+        info=helper.cache_info()
+        stats[name]={"Hits": info.hits, "Misses": info.misses, "Size": info.currsize}
+    return stats
+
+
+def LogHelperCacheStats() -> None:
+    for name, stats in HelperCacheStats().items():
+        calls=stats["Hits"]+stats["Misses"]
+        if calls > 0:
+            Log(f"{name} cache: {stats['Hits']} hits, {stats['Misses']} misses ({100*stats['Hits']/calls:.0f}% hit rate), {stats['Size']} cached")
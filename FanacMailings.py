@@ -1,25 +1,61 @@
 from __future__ import annotations
 
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING
 from dataclasses import dataclass, field
+import dataclasses
+import argparse
 import csv
+import hashlib
+import json
+import math
+import operator
 import os
+import pickle
 import re
+import sys
 import datetime
+import time
 
-import openpyxl
-
-from FanzineIssueSpecPackage import FanzineDate
+from LazyImport import LazyModule
+from GzipPages import GzipPagesFinish, GzipResults
+from PageWriter import PageWriter, UpdatedFormat
+from PageTemplate import PageTemplate, TableBuilder
+from RunProfile import RunProfile
 from Settings import Settings
-from HelpersPackage import FindAndReplaceBracketedText, ParseFirstStringBracketedText, SortMessyNumber, SortTitle, Pluralize, NormalizePersonsName, Int0, FormatLink
-from HelpersPackage import FindIndexOfStringInList, FormatCount, UnicodeToHtml, MakeFancyLink, SplitOnAnySingleChar
-from Log import LogError, Log, LogDisplayErrorsIfAny, LogOpen
-
-
-def main():
+from CachedHelpers import SortMessyNumber, NormalizePersonsName, FormatLink, MakeFancyLink
+from CachedHelpers import HelperCacheStats, LogHelperCacheStats
+from Log import LogDisplayErrorsIfAny, LogOpen
+from LogQueue import LogError, Log, LogDebug, LogQueueStart, LogQueueStop, LevelNames, ParseSampling
+
+# These are only loaded when first used, so that a run which doesn't need them doesn't wait for them to be imported.
+# (python -X importtime FanacMailings.py shows what is imported at startup.  See also Benchmarks/BenchStartup.py.)
+openpyxl=LazyModule("openpyxl")
+FanzineIssueSpecPackage=LazyModule("FanzineIssueSpecPackage")
+HelpersPackage=LazyModule("HelpersPackage")
+ApazineDatabase=LazyModule("ApazineDatabase")
+ConcurrentFutures=LazyModule("concurrent.futures")     # Only needed for --jobs
+Multiprocessing=LazyModule("multiprocessing")
+
+if TYPE_CHECKING:
+    from FanzineIssueSpecPackage import FanzineDate
+
+
+def main(argv: list[str] | None=None):
+    args=ParseCommandLine(argv)
+    # Profiling, if turned on, times each phase of the run and counts the work done in it
+    profile=RunProfile(args.profile or args.cprofile, cprofile=args.cprofile)
     LogOpen("log.txt", "log-ERRORS.txt")
     if not Settings().Load("FanacMailings settings.txt", MustExist=True, SuppressMessageBox=True):
         LogError("Could not find settings file 'FanacMailings settings.txt'")
         return
+    if SettingIsTrue("Profile"):
+        profile.Enable(cprofile=SettingIsTrue("Profile render loop"))
+
+    # From here on the log is written by a background thread
+    level=args.log_level if args.log_level is not None else Settings().Get("Log level").strip().lower()
+    LogQueueStart(LevelNames.get(level, LevelNames["info"]), ParseSampling(Settings().Get("Log sampling")))
 
     # **************************************************************************
     # Get the list of known apas
@@ -29,89 +65,30 @@ def main():
         return
     knownApas=[x.replace('"', '').strip() for x in knownApas.split(",")]
 
-    # **************************************************************************
-    # for each known apa, read Joe's APA mailings data if it exists
-    # Mailings is a dictionary indexed by the apa name.
-    #   The value is a dictionary indexed by the mailing number as a string
-    #       The value of *that* is a MailingDev
-    # Note that we do  not fill in Counts here
-    mailingsInfoTablefromJoe: dict[str, dict[str, MailingInfoFromJoe]]={}
-        # 1st level key is APA name
-        # 2nd level key is mailing name
-    for apaName in knownApas:
-        table=ReadXLSX(apaName)
-        if table is None:
-            table={}
-        mailingsInfoTablefromJoe[apaName]=table
-
     # **************************************************************************
     # Get the location of the CSV source file (generated by FanacAnalyzer) out of settings
     sourceCSVfile=Settings().Get("CSVSource")
     if len(sourceCSVfile) == 0:
         LogError("Settings file 'FanacMailings settings.txt' does not contain a value for CSVSource (the file generated by FanacAnalyzer)")
         return
-    # Open and read it
-    try:
-        with open(sourceCSVfile, 'r', encoding="utf-8") as csvfile:
-            filereader=csv.reader(csvfile, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-            mailingsdata=[x for x in filereader]
-    except FileNotFoundError:
-        LogError(f"Could not open CSV file {sourceCSVfile}")
-        return
-
-    if len(mailingsdata) < 100:
-        LogError(f"There are {len(mailingsdata)} items in {sourceCSVfile} -- there should be many hundreds")
-
-    # Segregate the headers info
-    mailingsHeaders=mailingsdata[0]
-    mailingsdata=mailingsdata[1:]
-
-    # ---------------------------
-    # Turn the data from FanacAnalyzer into a dictionary of the form dict(apa, dict(mailing, data)) by loading
-    # the individual fanzine issue information read from the file from FanacAnalyzer
-    # Allmailings is keyed by the apa's name.  The value is an EntireAPA object
-    allAPAs: AllAPAs=AllAPAs()
-    for row in mailingsdata:
-        fanzine=FanzineInMailing(mailingsHeaders, row)
-        # The mailings column maay be of the form   ['FAPA 20 & VAPA 23']
-        mailings=fanzine.Mailings.removeprefix("['").removesuffix("']")
-        mailings=[x.strip() for x in SplitOnAnySingleChar("&,",mailings)]
-        for mailing in mailings:
-            for apaName in knownApas:
-                m=re.match(rf"{apaName}\s(.*)$", mailing)
-                if m is not None:
-                    mailingNumber=m.groups()[0]
-                    allAPAs[apaName][mailingNumber].append(fanzine)
-                    break
-
-    # ------------------
-    # We've slurped in all the data.
-    # Now merge Joe's mailing info into allAPAs
-    for apa in allAPAs:
-        for mailing in apa:
-            if apa.Name in mailingsInfoTablefromJoe:
-                if mailing.Number in mailingsInfoTablefromJoe[apa.Name]:
-                    mailing.MIFJ=mailingsInfoTablefromJoe[apa.Name][mailing.Number]
-
-
-    # The next step is to generate the counts
-    # Walk through allAPAs
-    # For each APA that we found there extract the data, merge it was Joe's data, and create a unified dataset to generate the web pages
-    countAllAPAs=Counts()       # This is the only 'bare' Counts -- all the others are in larger structures
-    for apa in allAPAs:
-
-        # For each mailing of that APA count up the issues and pages
-        for mailing in apa:
-            # Sort the contributions into order by fanzine name
-            #apa[mailingName]=sorted(apa[mailingName], key=lambda x: SortTitle(x.IssueName))
 
-            # Now generate the data rows in the mailings table
-            for apazine in mailing:
-                mailing.Count+=Counts(Issues=1, Pages=apazine.PageCount)
-            apa.Count+=Counts(Mailings=1, Issues=mailing.Count.Issues, Pages=mailing.Count.Pages)
-
-        countAllAPAs+=Counts(Mailings=apa.Count.Mailings, Issues=apa.Count.Issues, Pages=apa.Count.Pages)
+    # **************************************************************************
+    # If the CSV, Joe's spreadsheet and the list of known APAs are all unchanged since the last run, the model built then can be reused.
+    # Otherwise, build it from them.
+    profile.Phase("Snapshot load")
+    allAPAs=LoadModelSnapshot(sourceCSVfile, knownApas)
+    if allAPAs is None:
+        allAPAs=BuildModel(sourceCSVfile, knownApas, profile)
+        if allAPAs is None:
+            return
+        profile.Phase("Snapshot save")
+        SaveModelSnapshot(sourceCSVfile, knownApas, allAPAs)
 
+    # Optionally, export the apazines and mailings to an SQLite database for other queries
+    databaseFile=args.sqlite if args.sqlite is not None else Settings().Get("SQLite database")
+    if databaseFile != "":
+        profile.Phase("SQLite export")
+        ApazineDatabase.ExportApazineDatabase(databaseFile, allAPAs)
 
     ##################################################################################################################
     # We have done all the analysis: generate the HTML pages
@@ -124,53 +101,70 @@ def main():
     if not os.path.exists(reportsdir):
         os.mkdir(reportsdir)
 
-    # All the pages we generate here need the same kinds of information to be added:
-    #   Page title
-    #   Page metadata
-    #   Updated timestamp
-    def AddBoilerplate(page: str, title: str, metadata: str) -> str:
-        start, mid, end=ParseFirstStringBracketedText(page, "fanac-title")
-        mid=mid.replace("title of page", title)
-        page=start+mid+end
+    # Read and compile the page templates
+    profile.Phase("Template load")
+    templates=ReadTemplates()
+    if templates is None:
+        return
 
-        start, mid, end=ParseFirstStringBracketedText(page, "head")
-        mid=mid.replace("mailing content", metadata)
-        page=start+mid+end
+    options=GenerateOptions(Incremental=args.incremental or SettingIsTrue("Incremental build"),
+                            Compress=args.gzip or SettingIsTrue("Gzip pages"),
+                            Jobs=args.jobs if args.jobs > 0 else os.cpu_count() or 1,
+                            ApaPageSize=args.apa_page_size if args.apa_page_size is not None else HelpersPackage.Int0(Settings().Get("APA page size")),
+                            ApaData=args.apa_json or SettingIsTrue("APA data files"))
+    manifest, bytesWritten=GeneratePages(allAPAs, templates, reportsdir, options, profile)
+
+    profile.Set("Pages rendered", manifest.Generated)
+    profile.Set("Bytes written", bytesWritten)
+    profile.Set("Files rewritten", len(manifest.Added)+len(manifest.Changed))
+    profile.Set("Files skipped", manifest.Skipped+len(manifest.Unchanged))
+    LogHelperCacheStats()
+    for name, stats in HelperCacheStats().items():
+        profile.Set(f"{name} cache", stats)
+    profile.Save(os.path.join(reportsdir, "FanacMailings run report.json"), Jobs=options.Jobs, Incremental=manifest.Incremental)
+
+    if args.watch:
+        Watch(allAPAs, templates, sourceCSVfile, knownApas, reportsdir, options, args.poll)
 
-        # Add the updated date/time
-        page, _=FindAndReplaceBracketedText(page, "fanac-updated", f"Updated {datetime.datetime.now().strftime('%m/%d/%Y, %H:%M:%S')}")
-        return page
+# End Main
+###################################################################
 
 
-    # Read the mailing template file
-    templateFilename=Settings().Get("Template-Mailing")
-    if len(templateFilename) == 0:
-        LogError("Settings file 'FanacMailings settings.txt' does not contain a value for Template-Mailing (the name of the template file for an individual mailing page)")
-        return
-    try:
-        with open(templateFilename, "r") as file:
-            templateMailing="".join(file.readlines())
-    except FileNotFoundError:
-        LogError(f"Could not open the mailing template file: '{templateFilename}'")
-        return
-
-    # Read the apa template file
-    templateFilename=Settings().Get("Template-APA")
-    if len(templateFilename) == 0:
-        LogError("Settings file 'FanacMailings settings.txt' does not contain a value for Template-APA (the template for an APA page)")
-        return
-    try:
-        with open(templateFilename, "r") as file:
-            templateApa="".join(file.readlines())
-    except FileNotFoundError:
-        LogError(f"Could not open the APA template file, '{templateFilename}'")
-        return
+# How the pages are to be generated
+@dataclass
+class GenerateOptions:
+    Incremental: bool=False     # Skip the pages whose inputs haven't changed since the last run?
+    Compress: bool=False        # Write a gzipped copy of each page?
+    Jobs: int=1                 # The number of processes to render the mailing pages in
+    ApaPageSize: int=0          # The number of mailings on each of an APA's index pages (0 puts them all on one page)
+    ApaData: bool=False         # Write a JSON file of each APA's mailings?
+
+
+# Generate the HTML pages in reportsdir.
+# Returns the build manifest (which has counts of the pages generated and skipped) and the number of bytes written.
+def GeneratePages(allAPAs: AllAPAs, templates: PageTemplates, reportsdir: str, options: GenerateOptions, profile: RunProfile) -> tuple[BuildManifest, int]:
+    templateMailing=templates.Mailing
+    templateApa=templates.Apa
+    templateAllApas=templates.AllApas
+    templateEditor=templates.Editor
+    compress=options.Compress
+    jobs=options.Jobs
+
+    # The build manifest records a fingerprint of the inputs of every page we generate.
+    # In an incremental build, pages whose inputs have not changed since the last run are not regenerated.
+    manifest=BuildManifest(reportsdir, options.Incremental, compress)
+
+    # All the pages generated in this run get the same Updated timestamp
+    updated=datetime.datetime.now().strftime(UpdatedFormat)
 
     # Walk through the info generated by FanacAnalyzer.
     # For each APA that we found there:
-    #   Create an apa HTML page listing (and linking to) all the mailing pages
     #   Create all the individual mailing pages
+    #   Create an apa HTML page listing (and linking to) all the mailing pages
+    # First work out which mailing pages need to be generated.  Each depends only on the mailing and its neighbours' numbers.
+    profile.Phase("Sort and fingerprint")
     allAPAs.sort()
+    mailingWork: list[tuple[str, list[MailingPageWork]]]=[]       # (APA name, work for its mailing pages)
     for apa in allAPAs:
 
         # Make sure that a directory exists for this APA's html files
@@ -178,313 +172,1181 @@ def main():
             os.mkdir(os.path.join(reportsdir, apa.Name))
 
         apa.sort()
+        work=[]
         for mailing in apa:
             mailing.sort()
 
-            ##################################################################
-            ##################################################################
-            # Do a mailing page
-            # First, the top matter
-            # <div><fanac-top>
-            # <table class=topmatter>
-            # <tr><td class=topmatter>mailing</td></tr>
-            # <tr><td class=topmatter>editor</td></tr>
-            # <tr><td class=topmatter>date</td></tr>
-            # </table>
-            # </fanac-top></div>
-            mailingPage=templateMailing
-            start, mid, end=ParseFirstStringBracketedText(mailingPage, "fanac-top")
-            editor=f"OE: {NormalizePersonsName(mailing.MIFJ.Editor)}"
-            when=mailing.MIFJ.Date.FormatDate("%B %Y")
-            number=mailing.Number
-            mid=mid.replace("editor", editor)
-            mid=mid.replace("date", when)
-            mid=mid.replace("mailing", f"{apa.Name} Mailing #{number}")
-            mailingPage=start+mid+end
-
-            mailingPage=AddBoilerplate(mailingPage, f"{apa.Name}-{mailing.Number}", f"{mailing.Number}, {editor}, {when}, {apa.Name}-mailing")
-
-            # Now the bottom matter (the list of fanzines)
-            newtable="<tr>\n"
-            # Generate the header row, selecting only those headers which are in this dict:
-            colSelectionAndOrder=["IssueName", "Editor", "PageCount"]   # The columns to be displayed in order
-
-            newtable+="<th>Contribution</th>\n"
-            newtable+="<th>Editor</th>\n"
-            newtable+="<th>Pages</th>\n"
-            newtable+="</tr>\n"
-
-            # Now generate the data rows in the mailings table
-            for apazine in mailing:
-                countThisIssue=Counts()
-                countThisIssue.Issues=1
-                newtable+="<tr>\n"
-                Log(apazine.PageName)
-                if apazine.DirURL != "" and apazine.PageName != "":
-                    if apazine.PageName.startswith("//fanac.org"):
-                        # It's an absolute reference
-                        href=apazine.PageName
-                    else:
-                        # It's a relative reference
-                        href=f"{apazine.DirURL}/{apazine.PageName}"
-                    href=href.replace(" ", "%20")
-                    newtable+=f"<td>{FormatLink(href, UnicodeToHtml(apazine.IssueName))}</td>\n"
-                else:
-                    newtable+=f"<td>&nbsp;</td>\n"
-                if apazine.Editor != "":
-                    newtable+=f"<td>{MakeFancyLink(apazine.Editor)}&nbsp;&nbsp;</td>"
-                else:
-                    newtable+=f"<td>&nbsp;</td>\n"
-                if apazine.PageCount != "":
-                    newtable+=f"<td>{apazine.PageCount}</td>\n"
-                    countThisIssue+=Int0(apazine.PageCount)
-                else:
-                    newtable+=f"<td>&nbsp;</td>\n"
-                newtable+="</tr>\n"
-            newtable=newtable.replace("\\", "/")
-
-            # Insert the new issues table into the template
-            mailingPage, success=FindAndReplaceBracketedText(mailingPage, "fanac-rows", newtable)
-            if not success:
-                LogError(f"Could not add issues table to mailing page {templateFilename} at 'fanac-rows'")
-                return
-
-            # Insert the label for the button taking you to the previous mailing for this APA
-            index=apa.prevIndex(mailing.Number)
-            if index is None:
-                buttonText=f"No prev mailing "
-                link=""
-            else:
-                buttonText=f" Prev Mailing (#{apa[index].Number}) "
-                link=f'"{apa[index].Number}.html"'
-            mailingPage, success=FindAndReplaceBracketedText(mailingPage, "fanac-PrevMailing", buttonText)
-            if success:
-                mailingPage=mailingPage.replace('"prev.html"', link)
-            if not success:
-                LogError(f"Could not change prev button text on mailing page {templateFilename} at 'fanac-PrevMailing'")
-                return
-
-            # Insert the label for the button taking you up one level to all mailings for this APA
-            mailingPage, success=FindAndReplaceBracketedText(mailingPage, "fanac-AllMailings", f"All {apa.Name} mailings")
-            if not success:
-                LogError(f"Could not change up to APA button text on mailing page {templateFilename} at 'fanac-AllMailings'")
-                return
-
-            # Insert the label for the button taking you to the next mailing for this APA
-            index=apa.nextIndex(mailing.Number)
-            if index is None:
-                buttonText=f"No next mailing "
-                link=""
-            else:
-                buttonText=f" Next Mailing (#{apa[index].Number}) "
-                link=f'"{apa[index].Number}.html"'
-            mailingPage, success=FindAndReplaceBracketedText(mailingPage, "fanac-NextMailing", buttonText)
-            if success:
-                mailingPage=mailingPage.replace('"next.html"', link)
-            if not success:
-                LogError(f"Could not change next button text on mailing page {templateFilename} at 'fanac-NextMailing'")
-                return
-
-            # Modify the Mailto: so that the page name appears as the subject
-            mailingPage, success=FindAndReplaceBracketedText(mailingPage, "fanac-ThisPageName", f"{apa.Name}:{mailing.Number}")
-            if not success:
-                LogError(f"Could not change mailto Subject on mailing page {templateFilename} at 'fanac-ThisPageName'")
-                #return
-
-            # Add counts of mailings and contributions to bottom
-            start, mid, end=ParseFirstStringBracketedText(mailingPage, "fanac-totals")
-            mailingPage=f"{start} {mailing.Count}  {end}"
-
-            # Write the mailing file
-            fn=os.path.join(reportsdir, apa.Name, mailing.Number)+".html"
-            if not os.path.exists(fn):
-                pass     # Break point for testing
-            with open(fn, "w") as file:
-                mailingPage=mailingPage.split("\n")
-                file.writelines(mailingPage)
-
-
+            # Skip this page if nothing that goes into it has changed since it was last generated
+            if not manifest.NeedsUpdate(f"{apa.Name}/{mailing.Number}.html", MailingPageFingerprint(templateMailing.Text, apa, mailing)):
+                LogDebug("mailing", f"{apa.Name} mailing {mailing.Number} unchanged, so its page is skipped")
+                continue
+            LogDebug("mailing", f"{apa.Name} mailing {mailing.Number}: {HelpersPackage.Pluralize(len(mailing), 'contribution')} to be rendered")
+            work.append((mailing, apa.prevIndex(mailing.Number), apa.nextIndex(mailing.Number)))
+        if len(work) > 0:
+            mailingWork.append((apa.Name, work))
+    profile.Set("Mailings per APA", {apa.Name: len(apa) for apa in allAPAs})
+
+    # Report which APAs and mailings have changed since the last run
+    WriteChangeReport(reportsdir, manifest.RecordModel(allAPAs))
+
+    # Render and write the mailing pages, either here or spread over a pool of processes.
+    # The pool is left running while the APA pages are done below.
+    # The pages rendered here are handed to the writer, whose threads write them to disk while the rendering carries on.
+    # (Only the work done in this process shows up in the CPU times and the render loop profile.)
+    profile.Phase("Mailing pages")
+    profile.StartCProfile()
+    writer=PageWriter(compress)
+    pool=None
+    futures=[]
+    if jobs > 1:
+        # The workers are spawned rather than forked: this process already has threads running (the log writer, the page writer's),
+        # and a forked child would inherit any lock one of them held at that moment, held for good.
+        pool=ConcurrentFutures.ProcessPoolExecutor(max_workers=jobs, mp_context=Multiprocessing.get_context("spawn"))
+        # Split the work into a few chunks per process so that one big APA doesn't leave the others idle
+        chunkSize=max(1, math.ceil(sum([len(x[1]) for x in mailingWork])/(4*jobs)))
+        for apaName, work in mailingWork:
+            for i in range(0, len(work), chunkSize):
+                futures.append(pool.submit(WriteMailingPagesInWorker, templateMailing, apaName, work[i:i+chunkSize], reportsdir, updated, compress))
+    else:
+        for apaName, work in mailingWork:
+            WriteMailingPages(templateMailing, apaName, work, reportsdir, updated, writer)
+
+    profile.Phase("APA pages")
+    for apa in allAPAs:
         ##################################################################
         ##################################################################
-        # Now that the mailing pages are all done, do an apa page
-
-        # Add the APA's name at the top
-        start, mid, end=ParseFirstStringBracketedText(templateApa, "fanac-top")
-        mid=mid.replace("apa-name", apa.Name)
-        newAPAPage=start+mid+end
+        # Do an apa page
 
-        # Add random descriptive information if a file <apa>-bumpf.txt exists.  (E.g., SAPS-bumpf.txt)
+        # Read the random descriptive information for the APA if a file <apa>-bumpf.txt exists.  (E.g., SAPS-bumpf.txt)
         fname=apa.Name+"-bumpf.txt"
+        bumpf=None
         if os.path.exists(fname):
             with open(fname, "r") as file:
                 bumpf=file.read()
-            if len(bumpf) > 0:
-                start, mid, end=ParseFirstStringBracketedText(newAPAPage, "fanac-bumpf")
-                if len(end) > 0:
-                    mid=bumpf+"<p>"
-                    newAPAPage=start+mid+end
-            Log(f"Bumpf added to {apa.Name} page")
-        else:
-            Log(f" No {fname} file found, so no bumpf added to {apa.Name} page.")
 
-        newAPAPage=AddBoilerplate(newAPAPage, f"{apa.Name} Mailings", f"{apa.Name} mailings")
+        # The APA's list of all its mailings, which may be split over several pages.  (Only the first gets the bumpf.)
+        pages=ApaIndexPages(apa, options.ApaPageSize)
+        for page, (filename, mailings) in enumerate(pages):
+            pageBumpf=bumpf if page == 0 else None
+            if not manifest.NeedsUpdate(f"{apa.Name}/{filename}", ApaPageFingerprint(templateApa.Text, pageBumpf, apa, mailings, page, len(pages))):
+                continue
 
-        loc=newAPAPage.find("</fanac-rows>")
-        if loc < 0:
-            LogError(f"The APA template '{templateFilename}' is missing the '</fanac-rows>' indicator.")
-            return
-        newAPAPageFront=newAPAPage[:loc]
-        newAPAPageRear=newAPAPage[loc+len("</fanac-rows>"):]
+            if page == 0:
+                if bumpf is not None:
+                    Log(f"Bumpf added to {apa.Name} page")
+                else:
+                    Log(f" No {fname} file found, so no bumpf added to {apa.Name} page.")
 
-        apa.sort()
-        for mailing in apa:
-            when=mailing.MIFJ.Date
-            editor=mailing.MIFJ.Editor
-            issues=mailing.Count.Issues
-            pages=mailing.Count.Pages
-            newAPAPageFront+=(f"\n<tr><td>{FormatLink(mailing.Number+".html", mailing.Number)}</td>"
-                              f"<td>{when}</td><td>{editor}</td>"
-                              f"<td style='text-align: right'>{issues}&nbsp;&nbsp;&nbsp;&nbsp;</td>"
-                              f"<td style='text-align: right'>{pages}&nbsp;&nbsp;&nbsp;&nbsp;</td>"
-                              f"</tr>")
-
-        newAPAPage=newAPAPageFront+newAPAPageRear
-
-        # Add counts of mailings and contributions to bottom
-        start, mid, end=ParseFirstStringBracketedText(newAPAPage, "fanac-totals")
-        newAPAPage=f"{start} {apa.Count}  {end}"
-
-        # Add the updated date/time
-        newAPAPage, success=FindAndReplaceBracketedText(newAPAPage, "fanac-updated", f"Updated {datetime.datetime.now().strftime('%m/%d/%Y, %H:%M:%S')}>")
-
-        # Make the mailto correctly list the apa in the subject line
-        newAPAPage, success=FindAndReplaceBracketedText(newAPAPage, "fanac-APAPageMailto", f"Issue related to APA {apa.Name}")
-        if not success:
-            LogError(f"The APA template '{templateFilename}' is missing the '</fanac-APAPageMailto>' indicator.")
-            return
+            newAPAPage=RenderApaPage(templateApa, apa, pageBumpf, updated, mailings, page, len(pages))
+            writer.Write(f"{apa.Name}/{filename}", os.path.join(reportsdir, apa.Name, filename), newAPAPage)
 
-        # Write out the APA list of all mailings
-        with open(os.path.join(reportsdir, apa.Name, "index.html"), "w") as file:
-            file.writelines(newAPAPage)
+        # The data of the APA's mailings, for clients to filter and sort for themselves
+        if options.ApaData:
+            data=ApaData(apa)
+            if manifest.NeedsUpdate(f"{apa.Name}/{ApaDataName}", Fingerprint(data)):
+                writer.Write(f"{apa.Name}/{ApaDataName}", os.path.join(reportsdir, apa.Name, ApaDataName), data)
 
     ##################################################################
     ##################################################################
     # Generate the All Apas root page
+    profile.Phase("All-APAs page")
+    if manifest.NeedsUpdate("index.html", AllApasPageFingerprint(templateAllApas.Text, allAPAs)):
+        writer.Write("index.html", os.path.join(reportsdir, "index.html"), RenderAllApasPage(templateAllApas, allAPAs, updated))
 
-    templateFilename=Settings().Get("Template-allAPAs")
+    ##################################################################
+    # Generate the editor pages from the index of apazines by editor
+    if templateEditor is not None:
+        profile.Phase("Editor pages")
+        editorPages=EditorPages(allAPAs)
+        os.makedirs(os.path.join(reportsdir, "Editors"), exist_ok=True)
+        for editor, filename, apazines in editorPages:
+            if manifest.NeedsUpdate(f"Editors/{filename}", EditorPageFingerprint(templateEditor.Text, editor, apazines)):
+                writer.Write(f"Editors/{filename}", os.path.join(reportsdir, "Editors", filename), RenderEditorPage(templateEditor, editor, apazines, updated))
+        if manifest.NeedsUpdate("Editors/index.html", Fingerprint(templateEditor.Text, [(x[0], x[1], len(x[2])) for x in editorPages])):
+            writer.Write("Editors/index.html", os.path.join(reportsdir, "Editors", "index.html"), RenderEditorIndexPage(templateEditor, editorPages, updated))
+        profile.Set("Editor pages", len(editorPages))
+
+    # Wait for the pages to be written (and compressed), and record what happened to each
+    profile.Phase("Waiting for pages to be written")
+    results=[writer.Close()+(GzipPagesFinish(),)]
+    if pool is not None:
+        try:
+            results+=[future.result() for future in futures]
+        finally:
+            pool.shutdown()
+    bytesWritten=0
+    for written, failed, gzipped in results:
+        for path, size in written:
+            bytesWritten+=manifest.Wrote(path, size)
+        # (The errors are logged here, since those from a worker process would otherwise be lost.)
+        for path, error in failed+manifest.Gzipped(gzipped):
+            LogError(error)
+            manifest.Failed(path)
+    profile.StopCProfile(os.path.join(reportsdir, "FanacMailings render loop.prof"))
+
+    profile.Phase("Save manifest")
+    manifest.RemoveStale()
+    manifest.Save()
+    manifest.SaveDelta(updated)
+    return manifest, bytesWritten
+
+
+# Read the data -- Joe's spreadsheet and the CSV from FanacAnalyzer -- and build the model: the APAs, their mailings and the apazines in them,
+# along with Joe's info on each mailing and the counts
+def BuildModel(sourceCSVfile: str, knownApas: list[str], profile: RunProfile) -> AllAPAs | None:
+    # **************************************************************************
+    # for each known apa, read Joe's APA mailings data if it exists
+    # Mailings is a dictionary indexed by the apa name.
+    #   The value is a dictionary indexed by the mailing number as a string
+    #       The value of *that* is a MailingDev
+    # Note that we do  not fill in Counts here
+    profile.Phase("xlsx read")
+    mailingsInfoTablefromJoe: dict[str, dict[str, MailingInfoFromJoe]]=ReadXLSX(knownApas)
+        # 1st level key is APA name
+        # 2nd level key is mailing name
+
+    # ---------------------------
+    # Turn the data from FanacAnalyzer into a dictionary of the form dict(apa, dict(mailing, data)) by loading
+    # the individual fanzine issue information read from the file from FanacAnalyzer
+    # Allmailings is keyed by the apa's name.  The value is an EntireAPA object
+    profile.Phase("CSV ingest")
+    ingestStats=IngestStats()
+    allAPAs=IngestCSV(sourceCSVfile, knownApas, ingestStats)
+    if allAPAs is None:
+        return None
+    profile.Set("CSV rows read", ingestStats.Rows)
+    profile.Set("Fanzines bucketed", ingestStats.Bucketed)
+    profile.Set("Unmatched mailing specs", ingestStats.Unmatched)
+
+    # ------------------
+    # We've slurped in all the data.
+    # Now merge Joe's mailing info into allAPAs
+    profile.Phase("Joe-data merge")
+    MergeJoeData(allAPAs, mailingsInfoTablefromJoe)
+
+    # The next step is to generate the counts
+    profile.Phase("Count aggregation")
+    CountAPAs(allAPAs)
+    return allAPAs
+
+
+# Merge Joe's mailing info into allAPAs
+# When it is being merged again (replace=True) a mailing's info is only replaced if it has changed, so that the other mailings
+# keep their fingerprints, and a mailing which is no longer in Joe's info loses what it had.
+def MergeJoeData(allAPAs: AllAPAs, mailingsInfoTablefromJoe: dict[str, dict[str, MailingInfoFromJoe]], replace: bool=False) -> None:
+    for apa in allAPAs:
+        apaInfo=mailingsInfoTablefromJoe.get(apa.Name, {})
+        for mailing in apa:
+            mifj=apaInfo.get(mailing.Number)
+            if not replace:
+                if mifj is not None:
+                    mailing.MIFJ=mifj
+                continue
+            if mifj is None:
+                mifj=NoJoeData
+            if mifj.Fingerprint() != mailing.MIFJ.Fingerprint():
+                mailing.MIFJ=mifj
+
+
+##################################################################
+# Watch mode: keep the model and the compiled templates in memory and, whenever an input file changes, regenerate the pages it affects.
+# Deciding which pages those are is left to the build manifest: a page is only regenerated if something that goes into it has changed.
+#   The CSV:        the model is rebuilt, and the pages of the mailings (and APAs and editors) whose apazines changed are regenerated
+#   Joe's xlsx:     his info is merged again.  Only the mailings whose info has changed get it, so only their pages and their APAs' pages are regenerated.
+#   A template:     the pages made from it
+#   A bumpf file:   its APA's page
+# (A change to the settings needs a restart.)
+def Watch(allAPAs: AllAPAs, templates: PageTemplates, sourceCSVfile: str, knownApas: list[str], reportsdir: str, options: GenerateOptions, interval: float) -> None:
+    def Stamp(filename: str) -> tuple[int, int] | None:
+        try:
+            stat=os.stat(filename)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def WatchedFiles() -> list[str]:
+        return [sourceCSVfile, XLSXName]+TemplateFiles()+[apa.Name+"-bumpf.txt" for apa in allAPAs]
+
+    stamps={x: Stamp(x) for x in WatchedFiles()}
+    pending: dict[str, tuple[int, int] | None]={}       # The changed files, as they were at the last poll
+    Log(f"Watching {len(stamps)} input files for changes")
+    try:
+        while True:
+            time.sleep(interval)
+            current={x: Stamp(x) for x in WatchedFiles()}
+            changed=[x for x in current if current[x] != stamps.get(x)]
+            # Wait until the changed files have been the same for a whole poll, so that a file which is still being saved isn't read half-written
+            if any([pending.get(x) != current[x] for x in changed]):
+                pending={x: current[x] for x in changed}
+                continue
+            pending={}
+            if len(changed) == 0:
+                continue
+            start=time.perf_counter()
+            for filename in changed:
+                stamps[filename]=current[filename]
+
+            # A file which can't be read (or can't be read yet) is logged and the rebuild abandoned, keeping the model we have,
+            # rather than ending the watch.  It is tried again when it next changes.
+            try:
+                if sourceCSVfile in changed:
+                    model=BuildModel(sourceCSVfile, knownApas, RunProfile())
+                    if model is None:
+                        continue
+                    allAPAs=model
+                    SaveModelSnapshot(sourceCSVfile, knownApas, allAPAs)
+                elif XLSXName in changed:
+                    MergeJoeData(allAPAs, ReadXLSX(knownApas), replace=True)
+                    SaveModelSnapshot(sourceCSVfile, knownApas, allAPAs)
+                if any([x in changed for x in TemplateFiles()]):
+                    newTemplates=ReadTemplates()
+                    if newTemplates is None:
+                        continue
+                    templates=newTemplates
+
+                manifest, _=GeneratePages(allAPAs, templates, reportsdir, dataclasses.replace(options, Incremental=True), RunProfile())
+            except Exception as e:
+                LogError(f"Could not rebuild after a change to {', '.join(changed)}: {type(e).__name__}: {e}")
+                continue
+            Log(f"Rebuilt in {(time.perf_counter()-start)*1000:.0f} msec after a change to {', '.join(changed)}: "
+                f"{manifest.Generated} pages generated, {manifest.Skipped} unchanged")
+    except KeyboardInterrupt:
+        Log("Stopped watching")
+
+
+# Walk through allAPAs, totalling up the issues and pages of each mailing, the mailings, issues and pages of each APA, and the grand total.
+# The page counts were parsed when the CSV was read, and each mailing keeps them in an array, so a mailing's totals are
+# just the length and sum of its array.  Each level's totals are then the sums of the level below.
+# Returns the grand total (which is also left in allAPAs.Count)
+def CountAPAs(allAPAs: AllAPAs) -> Counts:
+    allMailings=allIssues=allPages=0
+    for apa in allAPAs:
+        apaIssues=apaPages=0
+        for mailing in apa:
+            issues=len(mailing.PageCounts)
+            pages=sum(mailing.PageCounts)
+            mailing.Count=Counts(Issues=issues, Pages=pages)
+            apaIssues+=issues
+            apaPages+=pages
+        apa.Count=Counts(Mailings=len(apa), Issues=apaIssues, Pages=apaPages)
+        allMailings+=len(apa)
+        allIssues+=apaIssues
+        allPages+=apaPages
+    allAPAs.Count=Counts(Mailings=allMailings, Issues=allIssues, Pages=allPages)
+    return allAPAs.Count
+
+
+##################################################################
+# Page templates
+
+# The compiled page templates.  (Editor is None if there's no template for the editor pages, in which case they aren't generated.)
+@dataclass
+class PageTemplates:
+    Mailing: PageTemplate
+    Apa: PageTemplate
+    AllApas: PageTemplate
+    Editor: PageTemplate | None
+
+
+# Read and compile all the templates.  Returns None (having logged the problem) if any of them can't be used.
+def ReadTemplates() -> PageTemplates | None:
+    templateMailing=ReadTemplate("Template-Mailing", "the name of the template file for an individual mailing page", "mailing", CompileMailingTemplate)
+    templateApa=ReadTemplate("Template-APA", "the template for an APA page", "APA", CompileApaTemplate)
+    templateAllApas=ReadTemplate("Template-allAPAs", "the template for the page listing all APAs", "all APAs", CompileAllApasTemplate)
+    if templateMailing is None or templateApa is None or templateAllApas is None:
+        return None
+    # The editor pages are only generated if there is a template for them
+    templateEditor=None
+    if Settings().Get("Template-Editor") != "":
+        templateEditor=ReadTemplate("Template-Editor", "the template for an editor page", "editor", CompileEditorTemplate)
+        if templateEditor is None:
+            return None
+    return PageTemplates(templateMailing, templateApa, templateAllApas, templateEditor)
+
+
+# The template files named in the settings
+def TemplateFiles() -> list[str]:
+    return [x for x in [Settings().Get(y) for y in ["Template-Mailing", "Template-APA", "Template-allAPAs", "Template-Editor"]] if x != ""]
+
+
+# Read a template file named in the settings and compile it.  Returns None (having logged the problem) if it can't be used.
+def ReadTemplate(settingName: str, description: str, pageKind: str, compiler: Callable[[str], PageTemplate]) -> PageTemplate | None:
+    templateFilename=Settings().Get(settingName)
     if len(templateFilename) == 0:
-        LogError("Settings file 'FanacMailings settings.txt' does not contain a value for Template-allAPAs (the template for the page listing all APAs)")
-        return
+        LogError(f"Settings file 'FanacMailings settings.txt' does not contain a value for {settingName} ({description})")
+        return None
     try:
         with open(templateFilename, "r") as file:
-            templateAllApas="".join(file.readlines())
+            text=file.read()
     except FileNotFoundError:
-        LogError(f"Could not open the all APAs template file, '{templateFilename}'")
-        return
-
-    templateAllApas=AddBoilerplate(templateAllApas, f"Mailings for All APAs", f"Mailings for All APAs")
-
-    listText="\n<i>Click on the APA's name to see APA's contents</i>\n"
-    listText+="<style>th, td{border-style: hidden;}</style>\n\n"
+        LogError(f"Could not open the {pageKind} template file: '{templateFilename}'")
+        return None
 
-    listText+="<table>\n<tr>\n<th>&nbsp;&nbsp;&nbsp;APA</th>\n<th>&nbsp;Mailings&nbsp;</th>\n<th>&nbsp;Apazines&nbsp;</th>\n<th>&nbsp;Pages&nbsp;</th</tr>\n"
+    template=compiler(text)
+    if len(template.Missing) > 0:
+        LogError(f"The {pageKind} template '{templateFilename}' is missing {', '.join(template.Missing)}")
+        return None
+    return template
+
+
+# All the pages we generate here need the same kinds of information to be added:
+#   Page title
+#   Page metadata
+#   Updated timestamp
+def CompileBoilerplate(template: PageTemplate) -> None:
+    template.ReplaceInTag("head", {"mailing content": "metadata"}, keepTags=True, required=False)
+    template.ReplaceInTag("fanac-title", {"title of page": "title"})
+    template.ReplaceTag("fanac-updated", "updated")
+
+
+# The mailing page's top matter looks like this:
+# <div><fanac-top>
+# <table class=topmatter>
+# <tr><td class=topmatter>mailing</td></tr>
+# <tr><td class=topmatter>editor</td></tr>
+# <tr><td class=topmatter>date</td></tr>
+# </table>
+# </fanac-top></div>
+def CompileMailingTemplate(text: str) -> PageTemplate:
+    template=PageTemplate(text)
+    template.ReplaceInTag("fanac-top", {"editor": "editor", "date": "date", "mailing": "mailing"})
+    CompileBoilerplate(template)
+    template.ReplaceTag("fanac-rows", "rows")
+    template.ReplaceTag("fanac-PrevMailing", "prevButton")
+    template.ReplaceText('"prev.html"', "prevLink", required=False)
+    template.ReplaceTag("fanac-AllMailings", "allButton")
+    template.ReplaceTag("fanac-NextMailing", "nextButton")
+    template.ReplaceText('"next.html"', "nextLink", required=False)
+    template.ReplaceTag("fanac-ThisPageName", "pageName", required=False)
+    template.ReplaceTag("fanac-totals", "totals")
+    return template
+
+
+def CompileApaTemplate(text: str) -> PageTemplate:
+    template=PageTemplate(text)
+    template.ReplaceInTag("fanac-top", {"apa-name": "apaName"})
+    template.ReplaceTag("fanac-bumpf", "bumpf", required=False)
+    CompileBoilerplate(template)
+    template.ReplaceText("</fanac-rows>", "rows")      # The rows go after the header row, replacing the closing tag
+    template.ReplaceTag("fanac-totals", "totals")
+    template.ReplaceTag("fanac-pages", "pages", required=False)     # The links between an APA's index pages, when it has more than one
+    template.ReplaceTag("fanac-APAPageMailto", "mailto")
+    return template
+
+
+def CompileEditorTemplate(text: str) -> PageTemplate:
+    template=PageTemplate(text)
+    template.ReplaceInTag("fanac-top", {"editor": "editor"})
+    CompileBoilerplate(template)
+    template.ReplaceTag("fanac-rows", "rows")
+    template.ReplaceTag("fanac-totals", "totals")
+    template.ReplaceTag("fanac-ThisPageName", "pageName", required=False)
+    return template
+
+
+def CompileAllApasTemplate(text: str) -> PageTemplate:
+    template=PageTemplate(text)
+    CompileBoilerplate(template)
+    template.ReplaceTag("fanac-list", "list")
+    return template
+
+
+##################################################################
+# Page rendering
+
+# The information needed to generate a mailing page: the mailing and the numbers of the previous and next mailings of its APA
+MailingPageWork=tuple["OneMailing", str | None, str | None]
+
+
+# Render a batch of mailing pages of one APA and hand them to writer, whose Close() reports what happened to each.
+# This may be run in a worker process, so it depends only on its arguments.
+def WriteMailingPages(template: PageTemplate, apaName: str, work: list[MailingPageWork], reportsdir: str, updated: str, writer: PageWriter) -> None:
+    for mailing, prev, next in work:
+        writer.Write(f"{apaName}/{mailing.Number}.html", os.path.join(reportsdir, apaName, mailing.Number)+".html",
+                     RenderMailingPage(template, apaName, mailing, prev, next, updated))
+
+
+# Render and write some mailing pages in a worker process.  Returns what its writer's Close() returned,
+# and what GzipPagesFinish() returned.
+def WriteMailingPagesInWorker(template: PageTemplate, apaName: str, work: list[MailingPageWork], reportsdir: str, updated: str,
+                              compress: bool) -> tuple[list[tuple[str, int | None]], list[tuple[str, str]], GzipResults]:
+    writer=PageWriter(compress)
+    WriteMailingPages(template, apaName, work, reportsdir, updated, writer)
+    # The pages must all be compressed before the work is reported done
+    return writer.Close()+(GzipPagesFinish(),)
+
+
+def RenderMailingPage(template: PageTemplate, apaName: str, mailing: OneMailing, prev: str | None, next: str | None, updated: str) -> str:
+    editor=f"OE: {NormalizePersonsName(mailing.MIFJ.Editor)}"
+    when=mailing.MIFJ.Date.FormatDate("%B %Y")
+
+    # The buttons taking you to the previous and next mailings for this APA
+    if prev is None:
+        prevButton=f"No prev mailing "
+        prevLink=""
+    else:
+        prevButton=f" Prev Mailing (#{prev}) "
+        prevLink=f'"{prev}.html"'
+    if next is None:
+        nextButton=f"No next mailing "
+        nextLink=""
+    else:
+        nextButton=f" Next Mailing (#{next}) "
+        nextLink=f'"{next}.html"'
+
+    return template.Render(title=f"{apaName}-{mailing.Number}",
+                           metadata=f"{mailing.Number}, {editor}, {when}, {apaName}-mailing",
+                           updated=updated,
+                           editor=editor, date=when, mailing=f"{apaName} Mailing #{mailing.Number}",
+                           rows=MailingTable(mailing),
+                           prevButton=prevButton, prevLink=prevLink,
+                           allButton=f"All {apaName} mailings",      # The button taking you up one level to all mailings for this APA
+                           nextButton=nextButton, nextLink=nextLink,
+                           pageName=f"{apaName}:{mailing.Number}",     # So that the page name appears as the subject of the Mailto:
+                           totals=f" {mailing.Count}  ")
+
+
+# The bottom matter of a mailing page: the table listing its fanzines
+# (This is the hottest loop in the program, so each row is a single f-string.)
+def MailingTable(mailing: OneMailing) -> str:
+    rows=[f"<tr>\n<td>{ContributionLink(apazine)}</td>\n<td>{EditorCell(apazine.Editor)}</td>\n<td>{apazine.PageCount or '&nbsp;'}</td>\n</tr>\n"
+          for apazine in mailing]
+    return "<tr>\n<th>Contribution</th>\n<th>Editor</th>\n<th>Pages</th>\n</tr>\n"+"".join(rows)
+
+
+# The link to an apazine on fanac.org, with any Windows-style backslashes turned into forward slashes
+def ContributionLink(apazine: FanzineInMailing) -> str:
+    if apazine.DirURL == "" or apazine.PageName == "":
+        return "&nbsp;"
+    if apazine.PageName.startswith("//fanac.org"):
+        # It's an absolute reference
+        href=apazine.PageName
+    else:
+        # It's a relative reference
+        href=f"{apazine.DirURL}/{apazine.PageName}"
+    # (Every contribution has its own link and title, so a cached FormatLink() or UnicodeToHtml() would only ever miss here.)
+    link=HelpersPackage.FormatLink(href.replace(" ", "%20"), HelpersPackage.UnicodeToHtml(apazine.IssueName))
+    if "\\" in link:
+        link=link.replace("\\", "/")
+    return link
+
+
+# The editor cell of a row of the mailing table, with any Windows-style backslashes turned into forward slashes
+def EditorCell(editor: str) -> str:
+    if editor == "":
+        return "&nbsp;"
+    link=MakeFancyLink(editor)
+    if "\\" in link:
+        link=link.replace("\\", "/")
+    return link+"&nbsp;&nbsp;"
+
+
+# Render an APA's index page.  If its mailings are split over several pages, this is page number page (counting from 0) of pages,
+# listing just mailings.
+def RenderApaPage(template: PageTemplate, apa: EntireAPA, bumpf: str | None, updated: str,
+                  mailings: list[OneMailing] | None=None, page: int=0, pages: int=1) -> str:
+    values={"pages": ""}
+    # Add the random descriptive information, if any
+    if bumpf is not None and len(bumpf) > 0:
+        values["bumpf"]=bumpf+"<p>"
+
+    totals=f" {apa.Count}  "      # Counts of mailings and contributions at the bottom
+    if pages > 1:
+        values["pages"]=ApaPageLinks(mailings, page, pages)
+        # A template without a place for the links gets them above the totals
+        if "pages" not in template:
+            totals=values["pages"]+totals
+
+    return template.Render(apaName=apa.Name,
+                           title=f"{apa.Name} Mailings",
+                           metadata=f"{apa.Name} mailings",
+                           updated=updated,
+                           rows=ApaTableRows(apa if mailings is None else mailings),
+                           totals=totals,
+                           mailto=f"Issue related to APA {apa.Name}",       # Make the mailto correctly list the apa in the subject line
+                           **values)
+
+
+# The rows of the table of mailings on an APA page
+def ApaTableRows(mailings: Iterable[OneMailing]) -> str:
+    rows=TableBuilder(["", "", "", "text-align: right", "text-align: right"], rowStart="\n<tr>", rowEnd="</tr>", cellEnd="")
+    rows.Rows((FormatLink(mailing.Number+".html", mailing.Number), mailing.MIFJ.Date, mailing.MIFJ.Editor,
+               f"{mailing.Count.Issues}&nbsp;&nbsp;&nbsp;&nbsp;", f"{mailing.Count.Pages}&nbsp;&nbsp;&nbsp;&nbsp;") for mailing in mailings)
+    return rows.Text()
+
+
+# The index pages of an APA: (filename, the mailings listed on it) for each.
+# If pageSize is 0, or the APA has no more mailings than that, there is just the one, index.html.  Otherwise the first page is index.html,
+# so links to the APA still work, and the rest are index-2.html, index-3.html, ...
+def ApaIndexPages(apa: EntireAPA, pageSize: int) -> list[tuple[str, list[OneMailing]]]:
+    if pageSize <= 0 or len(apa) <= pageSize:
+        return [("index.html", apa.List)]
+    return [(ApaIndexPageName(page), apa.List[i:i+pageSize]) for page, i in enumerate(range(0, len(apa), pageSize))]
+
+
+def ApaIndexPageName(page: int) -> str:
+    if page == 0:
+        return "index.html"
+    return f"index-{page+1}.html"
+
+
+# The links to the previous and next of an APA's index pages
+def ApaPageLinks(mailings: list[OneMailing], page: int, pages: int) -> str:
+    prevLink="&lt; Prev"
+    if page > 0:
+        prevLink=FormatLink(ApaIndexPageName(page-1), prevLink)
+    nextLink="Next &gt;"
+    if page+1 < pages:
+        nextLink=FormatLink(ApaIndexPageName(page+1), nextLink)
+    return (f'\n<p class="pages">{prevLink}&nbsp;&nbsp;&nbsp;Page {page+1} of {pages} '
+            f'(mailings {mailings[0].Number}&ndash;{mailings[-1].Number})&nbsp;&nbsp;&nbsp;{nextLink}</p>\n')
+
+
+# The data of each of an APA's mailings, as compact JSON: a list of columns, and a list of rows, one per mailing.
+ApaDataName="mailings.json"
+ApaDataColumns=["Number", "Year", "Month", "Date", "Editor", "Issues", "Pages"]
+
+def ApaData(apa: EntireAPA) -> str:
+    rows=[[mailing.Number, mailing.MIFJ.Year, mailing.MIFJ.Month, str(mailing.MIFJ.Date), mailing.MIFJ.Editor, mailing.Count.Issues, mailing.Count.Pages]
+          for mailing in apa]
+    # (It is kept to ASCII, since WritePage() writes in the platform's encoding and JSON clients expect UTF-8.)
+    return json.dumps({"APA": apa.Name, "Columns": ApaDataColumns, "Mailings": rows}, separators=(",", ":"))+"\n"
+
+
+def RenderAllApasPage(template: PageTemplate, allAPAs: AllAPAs, updated: str) -> str:
+    right="text-align: right"
+    listText=TableBuilder(["", right, right, right], rowStart="\n<tr>")
+    listText.Add("\n<i>Click on the APA's name to see APA's contents</i>\n")
+    listText.Add("<style>th, td{border-style: hidden;}</style>\n\n")
+
+    listText.Add("<table>\n<tr>\n<th>&nbsp;&nbsp;&nbsp;APA</th>\n<th>&nbsp;Mailings&nbsp;</th>\n<th>&nbsp;Apazines&nbsp;</th>\n<th>&nbsp;Pages&nbsp;</th</tr>\n")
 
-    allAPAs.sort()
     for apa in allAPAs:
-        listText+=(f"\n<tr><td>&nbsp;&nbsp;&nbsp;{FormatLink(apa.Name+'/index.html', apa.Name)}</td>\n"
-                          f"<td style='text-align: right'>{apa.Count.Mailings}&nbsp;&nbsp;&nbsp;</td>\n"
-                          f"<td style='text-align: right'>{apa.Count.Issues}&nbsp;&nbsp;&nbsp;</td>\n"
-                          f"<td style='text-align: right'>{FormatCount(apa.Count.Pages)}&nbsp;&nbsp;&nbsp;</td>\n"
-                          f"</tr>\n")
+        listText.Row(f"&nbsp;&nbsp;&nbsp;{FormatLink(apa.Name+'/index.html', apa.Name)}",
+                     f"{apa.Count.Mailings}&nbsp;&nbsp;&nbsp;", f"{apa.Count.Issues}&nbsp;&nbsp;&nbsp;", f"{HelpersPackage.FormatCount(apa.Count.Pages)}&nbsp;&nbsp;&nbsp;")
     # Add counts of mailings and contributions to bottom
-    for apa in allAPAs:
-        allAPAs.Count+=apa.Count
-    listText+=(f"\n<tr><td>&nbsp;&nbsp;&nbsp;&nbsp</td>\n"
-               f"<td style='text-align: right'>______&nbsp;&nbsp;</td>\n"
-               f"<td style='text-align: right'>______&nbsp;&nbsp;</td>\n"
-               f"<td style='text-align: right'>______&nbsp;&nbsp;</td>\n")
-    listText+=(f"\n<tr><td>&nbsp;&nbsp;&nbsp;&nbsp</td>\n"
-               f"<td style='text-align: right'>{allAPAs.Count.Mailings}&nbsp;&nbsp;&nbsp;</td>\n"
-               f"<td style='text-align: right'>{allAPAs.Count.Issues}&nbsp;&nbsp;&nbsp;</td>\n"
-               f"<td style='text-align: right'>{FormatCount(allAPAs.Count.Pages)}&nbsp;&nbsp;&nbsp;</td>\n"
-               f"</tr>\n")
-
-    listText+="</table>\n"
-    templateAllApas, success=FindAndReplaceBracketedText(templateAllApas, "fanac-list", listText)
-
-    with open(os.path.join(reportsdir, "index.html"), "w") as file:
-        file.writelines(templateAllApas)
+    listText.Row("&nbsp;&nbsp;&nbsp;&nbsp", "______&nbsp;&nbsp;", "______&nbsp;&nbsp;", "______&nbsp;&nbsp;")
+    listText.Row("&nbsp;&nbsp;&nbsp;&nbsp", f"{allAPAs.Count.Mailings}&nbsp;&nbsp;&nbsp;", f"{allAPAs.Count.Issues}&nbsp;&nbsp;&nbsp;",
+                 f"{HelpersPackage.FormatCount(allAPAs.Count.Pages)}&nbsp;&nbsp;&nbsp;")
+
+    listText.Add("</table>\n")
+
+    return template.Render(title="Mailings for All APAs", metadata="Mailings for All APAs", updated=updated, list=listText.Text())
 
-# End Main
-###################################################################
 
+##################################################################
+# Editor pages
+# Each editor gets a page in ReportsDir/Editors listing all their apazines in all the APAs, and Editors/index.html lists the editors.
+
+EditorPageWork=tuple[str, str, list[tuple[str, "OneMailing", "FanzineInMailing"]]]     # (editor, page filename, apazines)
+
+
+# Choose a filename for each editor's page and put each editor's apazines into APA, mailing and title order
+def EditorPages(allAPAs: AllAPAs) -> list[EditorPageWork]:
+    pages=[]
+    used: set[str]=set()
+    for editor in sorted(allAPAs.Editors.keys(), key=lambda x: x.lower()):
+        name=re.sub(r"[^A-Za-z0-9]+", "_", editor).strip("_") or "editor"
+        filename=name+".html"
+        i=1
+        while filename.lower() in used:
+            i+=1
+            filename=f"{name}_{i}.html"
+        used.add(filename.lower())
+        apazines=sorted(allAPAs.Editors[editor], key=lambda x: (x[0], x[1].SortKey, x[2].SortKey))
+        pages.append((editor, filename, apazines))
+    return pages
+
+
+def RenderEditorPage(template: PageTemplate, editor: str, apazines: list[tuple[str, OneMailing, FanzineInMailing]], updated: str) -> str:
+    table=TableBuilder(["", "", "", "text-align: right"])
+    table.Add("<tr>\n", "<th>Contribution</th>\n", "<th>Mailing</th>\n", "<th>Date</th>\n", "<th>Pages</th>\n", "</tr>\n")
+    table.Rows((ContributionLink(apazine), FormatLink(f"../{apaName}/{mailing.Number}.html".replace(" ", "%20"), f"{apaName} {mailing.Number}"),
+                mailing.MIFJ.Date.FormatDate("%B %Y") or "&nbsp;", apazine.PageCount or "&nbsp;") for apaName, mailing, apazine in apazines)
+    count=Counts(Issues=len(apazines), Pages=sum([x[2].Pages for x in apazines]))
+    return template.Render(title=f"Apazines by {editor}", metadata=f"{editor}, APA contributions", updated=updated,
+                           editor=editor, rows=table.Text(), totals=f" {count}  ", pageName=f"Editor:{editor}")
+
+
+def RenderEditorIndexPage(template: PageTemplate, pages: list[EditorPageWork], updated: str) -> str:
+    table=TableBuilder(["", "text-align: right"])
+    table.Add("<tr>\n", "<th>Editor</th>\n", "<th>Apazines</th>\n", "</tr>\n")
+    table.Rows((FormatLink(filename, editor), str(len(apazines))) for editor, filename, apazines in pages)
+    return template.Render(title="Apazines by Editor", metadata="Editors of APA contributions", updated=updated,
+                           editor="Editors of APA contributions", rows=table.Text(), totals=f" {HelpersPackage.Pluralize(len(pages), 'editor')}  ", pageName="Editors")
+
+
+# The inputs of an editor page are the template, the editor, and each apazine along with its mailing and the mailing's date
+def EditorPageFingerprint(template: str, editor: str, apazines: list[tuple[str, OneMailing, FanzineInMailing]]) -> str:
+    return Fingerprint(template, editor, [(apaName, mailing.Number, str(mailing.MIFJ.Date), apazine.Fingerprint()) for apaName, mailing, apazine in apazines])
+
+
+# Command line options.  (Most of the configuration is in 'FanacMailings settings.txt'.)
+def ParseCommandLine(argv: list[str] | None=None) -> argparse.Namespace:
+    parser=argparse.ArgumentParser(description="Generate the fanac.org pages listing the contents of APA mailings")
+    parser.add_argument("--incremental", action="store_true", help="only regenerate the pages whose inputs have changed since the last run")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N", help="render the mailing pages using N processes (0 means one per CPU core)")
+    parser.add_argument("--profile", action="store_true", help="time each phase of the run and write a run report to ReportsDir")
+    parser.add_argument("--cprofile", action="store_true", help="as --profile, and also write a cProfile dump of the page rendering to ReportsDir")
+    parser.add_argument("--gzip", action="store_true", help="also write a gzipped copy of each page (page.html.gz) for the web server to serve")
+    parser.add_argument("--apa-page-size", type=int, metavar="N", help="split each APA's index into pages of N mailings, linked by prev/next links (0 keeps them on one page)")
+    parser.add_argument("--apa-json", action="store_true", help="also write each APA's mailings (number, date, editor, issues and pages) to <APA>/mailings.json")
+    parser.add_argument("--watch", action="store_true", help="after generating the pages, keep watching the input files and regenerate the pages affected when one changes")
+    parser.add_argument("--poll", type=float, default=1.0, metavar="SECONDS", help="how often --watch checks the input files (the default is every second)")
+    parser.add_argument("--sqlite", metavar="FILE", help="also write the apazines and mailings to an SQLite database")
+    parser.add_argument("--log-level", choices=list(LevelNames.keys()), help="the least important lines to log (the default is info)")
+    return parser.parse_args(argv)
+
+
+# Is a yes/no setting in 'FanacMailings settings.txt' turned on?
+def SettingIsTrue(name: str) -> bool:
+    return Settings().Get(name).strip().lower() in ["yes", "true", "on", "1"]
+
+
+XLSXName="APA Mailings.xlsx"
 
 # Read the APA Mailings.xlsx file supplied by Joe to get OE, date, etc., information for each mailing.
-def ReadXLSX(apaName: str) -> dict[str, MailingInfoFromJoe] | None:
-    xlsxname="APA Mailings.xlsx"
+# The workbook is opened just once, in read-only (streaming) mode, and all of its sheets are parsed in a single pass.
+# The parsed sheets are cached on disk, so an unchanged spreadsheet is never parsed twice.
+# Returns a dictionary indexed by APA name whose values are dictionaries of MailingInfoFromJoe indexed by mailing number
+def ReadXLSX(apaNames: list[str]) -> dict[str, dict[str, MailingInfoFromJoe]]:
+    xlsxname=XLSXName
     # Skip missing xlsx files
     if not os.path.exists(xlsxname):
-        LogError("Can't find {xlsxname}")
-        return None
-    # Read the apa mailings file
+        LogError(f"Can't find {xlsxname}")
+        return {}
+
+    sheets=LoadXLSXCache(xlsxname)
+    if sheets is None:
+        sheets=ParseXLSX(xlsxname)
+        if sheets is None:
+            return {}
+        SaveXLSXCache(xlsxname, sheets)
+
+    mailingsInfoFromJoe: dict[str, dict[str, MailingInfoFromJoe]]={}
+    for apaName in apaNames:
+        sheet=sheets.get(apaName)
+        if sheet is None:
+            continue
+        if type(sheet) is str:
+            LogError(sheet)     # The sheet exists, but could not be parsed
+            continue
+        mailingsInfoFromJoe[apaName]={mailingNum: MailingInfoFromJoe(Number=mailingNum, Year=year, Month=month, Editor=editor)
+                                      for mailingNum, year, month, editor in sheet}
+    return mailingsInfoFromJoe
+
+
+# Parse every sheet of the xlsx file in one streaming pass over the workbook
+# Returns a dictionary indexed by sheet name.  The value is either a list of (mailing, year, month, editor) tuples
+# or, if the sheet lacks a needed column, the error message for it
+def ParseXLSX(xlsxname: str) -> dict[str, list[tuple] | str] | None:
     try:
-        wb=openpyxl.load_workbook(filename=xlsxname)
+        wb=openpyxl.load_workbook(filename=xlsxname, read_only=True, data_only=True)
     except FileNotFoundError:
         LogError(f"Could not open xlsx file {xlsxname}")
         return None
 
+    try:
+        return {ws.title: ParseXLSXSheet(xlsxname, ws) for ws in wb.worksheets}
+    finally:
+        wb.close()      # Read-only workbooks hold the file open until closed
+
 
-    if apaName not in wb.sheetnames:
-        return None
-    ws=wb[apaName]
+def ParseXLSXSheet(xlsxname: str, ws) -> list[tuple] | str:
+    rows=ws.iter_rows(values_only=True)
 
     # Separate out the header row
-    mailingsheaders=[x.value for x in ws[1]]
+    mailingsheaders=list(next(rows, []))
 
-    monthCol=FindIndexOfStringInList(mailingsheaders, "Month")
+    monthCol=HelpersPackage.FindIndexOfStringInList(mailingsheaders, "Month")
     if monthCol is None:
-        LogError(f"{xlsxname} does not contain a 'Month' column")
-        return None
-    yearCol=FindIndexOfStringInList(mailingsheaders, "Year")
+        return f"{xlsxname} sheet '{ws.title}' does not contain a 'Month' column"
+    yearCol=HelpersPackage.FindIndexOfStringInList(mailingsheaders, "Year")
     if yearCol is None:
-        LogError(f"{xlsxname} does not contain a 'Year' column")
-        return None
-    editorCol=FindIndexOfStringInList(mailingsheaders, ["Editor", "OE"])
+        return f"{xlsxname} sheet '{ws.title}' does not contain a 'Year' column"
+    editorCol=HelpersPackage.FindIndexOfStringInList(mailingsheaders, ["Editor", "OE"])
     if editorCol is None:
-        LogError(f"{xlsxname} does not contain an 'Editor' or an 'OE' column")
-        return None
-    mailingCol=FindIndexOfStringInList(mailingsheaders, ["Mailing", "Issue"])
+        return f"{xlsxname} sheet '{ws.title}' does not contain an 'Editor' or an 'OE' column"
+    mailingCol=HelpersPackage.FindIndexOfStringInList(mailingsheaders, ["Mailing", "Issue"])
     if mailingCol is None:
-        LogError(f"{xlsxname} does not contain a 'Mailing' or an 'Issue' column")
-        return None
+        return f"{xlsxname} sheet '{ws.title}' does not contain a 'Mailing' or an 'Issue' column"
 
-    mailingsInfoFromJoe={}
-    for i in range(2, 10000):
-        row=[x.value for x in ws[i]]
+    width=max(monthCol, yearCol, editorCol, mailingCol)+1
+    sheet=[]
+    for row in rows:
         if all([x is None for x in row]):
             break
+        if len(row) < width:
+            row=row+(None,)*(width-len(row))     # Streaming mode does not pad out short rows
         mailingNum=row[mailingCol]
         if type(mailingNum) is int:
             mailingNum=str(mailingNum)  # Standard is to treat mailing number as a string, because sometimes it has to be
         editor=row[editorCol]
         if editor is None:
             editor=""
-        mailingsInfoFromJoe[mailingNum]=MailingInfoFromJoe(Number=mailingNum, Year=row[yearCol], Month=row[monthCol], Editor=editor)
-    return mailingsInfoFromJoe
+        sheet.append((mailingNum, row[yearCol], row[monthCol], editor))
+    return sheet
+
+
+# The parsed xlsx is cached in a file next to it.
+# The cache is keyed by the xlsx's size and mtime, and failing that, by its content hash (so a touched-but-unchanged file is still a hit)
+XLSXCacheVersion=1
+
+def XLSXCacheName(xlsxname: str) -> str:
+    return xlsxname+".cache"
+
+
+def HashFile(filename: str) -> str:
+    h=hashlib.sha256()
+    with open(filename, "rb") as file:
+        while chunk := file.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def LoadXLSXCache(xlsxname: str) -> dict[str, list[tuple] | str] | None:
+    try:
+        with open(XLSXCacheName(xlsxname), "rb") as file:
+            cache=pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if type(cache) is not dict or cache.get("Version") != XLSXCacheVersion:
+        return None
+
+    stat=os.stat(xlsxname)
+    if cache["Size"] == stat.st_size and cache["MTime"] == stat.st_mtime_ns:
+        return cache["Sheets"]
+    # The file has been touched.  If its contents are unchanged, the cache is still good.
+    if cache["Size"] == stat.st_size and cache["Hash"] == HashFile(xlsxname):
+        SaveXLSXCache(xlsxname, cache["Sheets"], cache["Hash"])     # Update the mtime so next time the check is quick
+        return cache["Sheets"]
+    return None
+
+
+def SaveXLSXCache(xlsxname: str, sheets: dict[str, list[tuple] | str], contentHash: str="") -> None:
+    stat=os.stat(xlsxname)
+    cache={"Version": XLSXCacheVersion, "Size": stat.st_size, "MTime": stat.st_mtime_ns,
+           "Hash": contentHash if contentHash != "" else HashFile(xlsxname), "Sheets": sheets}
+    cachename=XLSXCacheName(xlsxname)
+    try:
+        with open(cachename+".tmp", "wb") as file:
+            pickle.dump(cache, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cachename+".tmp", cachename)
+    except OSError:
+        Log(f"Could not write xlsx cache file {cachename}")
+
+
+######################################################################
+# The model built from the data is saved as a snapshot, so that a run whose data hasn't changed (say, one made because a template
+# or some bumpf was edited) can go straight to generating the pages.
+# The snapshot is keyed by the CSV, Joe's xlsx and the list of known APAs.  Like the xlsx cache, it recognizes each file
+# by its size and mtime, and failing that, by its content hash.
+# Bump ModelSnapshotVersion whenever a change to this program changes the model (its classes, or what is read into them).
+ModelSnapshotVersion=5
+ModelSnapshotName="FanacMailings model.snapshot"
+
+def LoadModelSnapshot(sourceCSVfile: str, knownApas: list[str]) -> AllAPAs | None:
+    try:
+        with open(ModelSnapshotName, "rb") as file:
+            snapshot=pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if type(snapshot) is not dict or snapshot.get("Version") != ModelSnapshotVersion or snapshot["Known APAs"] != knownApas:
+        return None
+
+    files: dict[str, dict]=snapshot["Files"]
+    if set(files.keys()) != {sourceCSVfile, XLSXName}:
+        return None
+    touched=False
+    for filename, key in files.items():
+        try:
+            stat=os.stat(filename)
+        except OSError:
+            return None
+        if key["Size"] != stat.st_size:
+            return None
+        if key["MTime"] != stat.st_mtime_ns:
+            # The file has been touched.  If its contents are unchanged, the snapshot is still good.
+            if key["Hash"] != HashFile(filename):
+                return None
+            key["MTime"]=stat.st_mtime_ns
+            touched=True
+
+    if touched:
+        WriteModelSnapshot(snapshot)        # Update the mtimes so next time the check is quick
+    Log(f"The CSV, {XLSXName} and the known APAs are unchanged since the last run, so the model was loaded from {ModelSnapshotName}")
+    return snapshot["Model"]
+
+
+def SaveModelSnapshot(sourceCSVfile: str, knownApas: list[str], allAPAs: AllAPAs) -> None:
+    files={}
+    for filename in [sourceCSVfile, XLSXName]:
+        try:
+            stat=os.stat(filename)
+        except OSError:
+            return      # We can't tell if a file which doesn't exist has changed
+        files[filename]={"Size": stat.st_size, "MTime": stat.st_mtime_ns, "Hash": HashFile(filename)}
+    WriteModelSnapshot({"Version": ModelSnapshotVersion, "Known APAs": knownApas, "Files": files, "Model": allAPAs})
+
+
+def WriteModelSnapshot(snapshot: dict) -> None:
+    try:
+        with open(ModelSnapshotName+".tmp", "wb") as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(ModelSnapshotName+".tmp", ModelSnapshotName)
+    except OSError:
+        Log(f"Could not write the model snapshot {ModelSnapshotName}")
+
+
+######################################################################
+# Parse the contents of the Mailings column of the FanacAnalyzer CSV into (APA name, mailing number) pairs.
+# The mailings column may be of the form   ['FAPA 20 & VAPA 23']
+# The parser is built once from the list of known APAs.  It recognizes the APA with a single compiled alternation of all
+# their names, tried longest first, so that (e.g.) "FAPA Extra 3" is never taken to be mailing "Extra 3" of FAPA.
+class MailingSpecParser:
+    def __init__(self, apaNames: list[str]):
+        names=sorted({x for x in apaNames if x != ""}, key=lambda x: (-len(x), x))
+        self._pattern: re.Pattern | None=None
+        self.Unmatched: int=0       # The number of specs Parse() has seen which weren't of a known APA
+        if len(names) > 0:
+            self._pattern=re.compile(rf"({'|'.join([re.escape(x) for x in names])})\s(.*)$")
+
+    # Match a single mailing spec (e.g., "FAPA 20") returning (APA name, mailing number) or None if it isn't a known APA
+    def Match(self, spec: str) -> tuple[str, str] | None:
+        if self._pattern is None:
+            return None
+        m=self._pattern.match(spec)
+        if m is None:
+            return None
+        return m.group(1), m.group(2)
+
+    # Parse an entire Mailings column value into a list of (APA name, mailing number) pairs.  Unknown APAs are dropped.
+    def Parse(self, mailings: str) -> list[tuple[str, str]]:
+        mailings=mailings.removeprefix("['").removesuffix("']")
+        specs=[]
+        for mailing in HelpersPackage.SplitOnAnySingleChar("&,", mailings):
+            spec=self.Match(mailing.strip())
+            if spec is not None:
+                specs.append(spec)
+            elif mailing.strip() != "":
+                self.Unmatched+=1
+        return specs
+
+
+######################################################################
+# Read the CSV file generated by FanacAnalyzer and file each fanzine in it under the APA mailings it was part of.
+# The ingest is a pipeline of generators:
+#       csv.reader --> FanzineInMailing --> (APA name, mailing number, fanzine) --> AllAPAs
+# so each row is processed as it is read and the raw CSV is never held in memory.
+# The ingest's totals are accumulated in stats, if it is supplied.
+def IngestCSV(sourceCSVfile: str, knownApas: list[str], stats: IngestStats | None=None) -> AllAPAs | None:
+    allAPAs: AllAPAs=AllAPAs()
+    if stats is None:
+        stats=IngestStats()
+    parser=MailingSpecParser(knownApas)
+    try:
+        with open(sourceCSVfile, 'r', encoding="utf-8") as csvfile:
+            filereader=csv.reader(csvfile, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            fanzines=ReadFanzines(filereader, stats)
+            for apaName, mailingNumber, fanzine in SplitMailingSpecs(fanzines, parser):
+                mailing=allAPAs[apaName][mailingNumber]
+                mailing.append(fanzine)
+                stats.Bucketed+=1
+
+                # Index the apazine under its editor, too
+                if fanzine.Editor != "":
+                    allAPAs.Editors.setdefault(NormalizePersonsName(fanzine.Editor), []).append((apaName, mailing, fanzine))
+    except FileNotFoundError:
+        LogError(f"Could not open CSV file {sourceCSVfile}")
+        return None
+    stats.Unmatched+=parser.Unmatched
+
+    if stats.Rows < 100:
+        LogError(f"There are {stats.Rows} items in {sourceCSVfile} -- there should be many hundreds")
+    Log(f"Read {stats.Rows} rows from {sourceCSVfile} and filed {stats.Bucketed} apazines into mailings")
+    return allAPAs
+
+
+# Running totals kept as the CSV streams through the ingest pipeline
+@dataclass
+class IngestStats:
+    Rows: int=0         # Data rows read from the CSV
+    Bucketed: int=0     # Apazines filed into a mailing (a fanzine in a joint mailing is counted once per mailing)
+    Unmatched: int=0    # Mailing specs which weren't of a known APA
+
+
+# Turn the rows of the CSV into FanzineInMailings.  The first row is the column headers.
+def ReadFanzines(filereader: Iterable[list[str]], stats: IngestStats) -> Iterator[FanzineInMailing]:
+    rows=iter(filereader)
+    headers=next(rows, None)
+    if headers is None:
+        return
+    makeFanzine=FanzineInMailing.RowFactory(headers)
+    for row in rows:
+        stats.Rows+=1
+        yield makeFanzine(row)
+
+
+# Split each fanzine's Mailings column into the individual mailings it was part of
+def SplitMailingSpecs(fanzines: Iterable[FanzineInMailing], parser: MailingSpecParser) -> Iterator[tuple[str, str, FanzineInMailing]]:
+    for fanzine in fanzines:
+        for apaName, mailingNumber in parser.Parse(fanzine.Mailings):
+            yield apaName, mailingNumber, fanzine
+
+
+######################################################################
+# The build manifest lives in ReportsDir and records, for each page generated, a fingerprint of everything that went into it.
+# In an incremental build, a page whose fingerprint is the same as last time (and which still exists) is not regenerated.
+# Note that the "Updated" timestamp is not one of the inputs.
+# Bump BuildManifestVersion whenever a change to this program changes the pages it generates, so that the next build is a full one.
+BuildManifestVersion=3
+
+class BuildManifest:
+    Filename="FanacMailings build manifest.json"
+    DeltaFilename="FanacMailings delta.json"
+
+    def __init__(self, reportsdir: str, incremental: bool, compress: bool=False):
+        self._reportsdir: str=reportsdir
+        self.Incremental: bool=incremental
+        self.Compress: bool=compress        # Does each page have a gzipped copy?
+        manifest=self.Load()
+        self._old: dict[str, str]=manifest.get("Pages", {}) if incremental else {}     # Page path --> fingerprint as of the last run
+        self._new: dict[str, str]={}        # Page path --> fingerprint for this run
+        self._previous: list[str]=list(manifest.get("Pages", {}).keys())    # The pages generated by the last run
+        self._existed: set[str]=set()       # The pages to be generated which are already there
+        self._failed: set[str]=set()        # The pages which couldn't be written
+        self._oldModel: dict | None=manifest.get("Model")      # The fingerprints of the last run's model (see ModelFingerprints())
+        self._newModel: dict | None=None
+        self.Generated: int=0
+        self.Skipped: int=0
+        # The pages actually written (i.e., not skipped) which were new, were changed and were left alone because they were unchanged;
+        # and the pages which were deleted because they are no longer generated
+        self.Added: list[str]=[]
+        self.Changed: list[str]=[]
+        self.Unchanged: list[str]=[]
+        self.Deleted: list[str]=[]
+        # The .gz files (by their own paths) which were written new, were rewritten, and were deleted
+        self.GzipAdded: list[str]=[]
+        self.GzipChanged: list[str]=[]
+        self.GzipDeleted: list[str]=[]
+
+    def Load(self) -> dict:
+        try:
+            with open(os.path.join(self._reportsdir, self.Filename), "r", encoding="utf-8") as file:
+                manifest=json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if type(manifest) is not dict or manifest.get("Version") != BuildManifestVersion:
+            return {}
+        return manifest
+
+    # Record the fingerprints of this run's model and return what has changed in it since the last run
+    # Returns None if there is no record of the last run
+    def RecordModel(self, allAPAs: AllAPAs) -> dict[str, list | dict] | None:
+        self._newModel=ModelFingerprints(allAPAs)
+        if self._oldModel is None:
+            return None
+        return DiffModels(self._oldModel, self._newModel)
+
+    # Record the fingerprint of a page's inputs and return True if the page needs to be (re)generated
+    # The path is relative to ReportsDir and always uses "/"
+    def NeedsUpdate(self, path: str, fingerprint: str) -> bool:
+        self._new[path]=fingerprint
+        filename=os.path.join(self._reportsdir, path)
+        exists=os.path.exists(filename)
+        if self._old.get(path) == fingerprint and exists and (not self.Compress or os.path.exists(filename+".gz")):
+            self.Skipped+=1
+            return False
+        if exists:
+            self._existed.add(path)
+        self.Generated+=1
+        return True
+
+    # Record what happened when a page was written (written is what WritePage() returned) and return the number of bytes written
+    def Wrote(self, path: str, written: int | None) -> int:
+        if written is None:
+            self.Unchanged.append(path)
+            return 0
+        if path in self._existed:
+            self.Changed.append(path)
+        else:
+            self.Added.append(path)
+        return written
+
+    # Record what happened to the pages' .gz files.  Returns (path, error message) for each page which couldn't be compressed.
+    def Gzipped(self, results: GzipResults) -> list[tuple[str, str]]:
+        for filename, existed in results.Written:
+            (self.GzipChanged if existed else self.GzipAdded).append(self._Path(filename)+".gz")
+        self.GzipDeleted.extend([self._Path(x)+".gz" for x in results.Deleted])
+        return [(self._Path(filename), error) for filename, error in results.Failed]
+
+    # The path (relative to ReportsDir, always using "/") of a file
+    def _Path(self, filename: str) -> str:
+        return os.path.relpath(filename, self._reportsdir).replace(os.sep, "/")
+
+    # A page which couldn't be written is left out of the manifest, so that it will be generated again next time.
+    # Whatever copy of it is already there is kept: it isn't stale, just not updated.
+    def Failed(self, path: str) -> None:
+        self._new.pop(path, None)
+        self._failed.add(path)
+
+    # Delete the pages which the last run generated but this one didn't (e.g., the page of a mailing which is no longer in the data)
+    def RemoveStale(self) -> None:
+        for path in self._previous:
+            if path in self._new or path in self._failed:
+                continue
+            filename=os.path.join(self._reportsdir, path)
+            if os.path.exists(filename):
+                os.remove(filename)
+            self.Deleted.append(path)
+            if os.path.exists(filename+".gz"):
+                os.remove(filename+".gz")
+                self.GzipDeleted.append(path+".gz")
+        if len(self.Deleted) > 0:
+            Log(f"{HelpersPackage.Pluralize(len(self.Deleted), 'stale page')} deleted")
+
+    # Add the files under ReportsDir which this run added, changed and deleted to the delta: the list of them which have yet to be uploaded.
+    # (The .gz files are listed as they were actually written and deleted, which needn't be along with their pages:
+    # e.g., turning on compression adds a .gz to every page, changed or not.)
+    # Runs accumulate in the delta until the uploader has uploaded them and deleted it (or emptied it), so nothing is lost when there is
+    # more than one run between uploads, as there is with --watch.
+    def SaveDelta(self, updated: str) -> None:
+        Log(f"{len(self.Added)} pages added, {len(self.Changed)} changed, {len(self.Unchanged)} unchanged and left alone, {len(self.Deleted)} deleted")
+        filename=os.path.join(self._reportsdir, self.DeltaFilename)
+        delta=self.LoadDelta()
+        added, changed, deleted=set(delta["Added"]), set(delta["Changed"]), set(delta["Deleted"])
+        for path in self.Added+self.GzipAdded:
+            # A file deleted since the last upload and then generated again is still there on the server
+            if path in deleted:
+                deleted.discard(path)
+                changed.add(path)
+            else:
+                added.add(path)
+        changed.update([x for x in self.Changed+self.GzipChanged if x not in added])
+        for path in self.Deleted+self.GzipDeleted:
+            # A file added since the last upload and then deleted never reached the server
+            if path in added:
+                added.discard(path)
+            else:
+                changed.discard(path)
+                deleted.add(path)
+        with open(filename+".tmp", "w", encoding="utf-8") as file:
+            json.dump({"Updated": updated, "Added": sorted(added), "Changed": sorted(changed), "Deleted": sorted(deleted)}, file, indent=1)
+        os.replace(filename+".tmp", filename)
+
+    # The delta still waiting to be uploaded.  (Missing, empty or unreadable means there is none.)
+    def LoadDelta(self) -> dict[str, list[str]]:
+        delta={"Added": [], "Changed": [], "Deleted": []}
+        try:
+            with open(os.path.join(self._reportsdir, self.DeltaFilename), "r", encoding="utf-8") as file:
+                old=json.load(file)
+        except (OSError, ValueError):
+            return delta
+        if type(old) is dict:
+            for key in delta:
+                if type(old.get(key)) is list:
+                    delta[key]=old[key]
+        return delta
+
+    def Save(self) -> None:
+        Log(f"{self.Generated} pages generated, {self.Skipped} unchanged pages skipped")
+        filename=os.path.join(self._reportsdir, self.Filename)
+        with open(filename+".tmp", "w", encoding="utf-8") as file:
+            json.dump({"Version": BuildManifestVersion, "Pages": self._new, "Model": self._newModel}, file, indent=0, sort_keys=True)
+        os.replace(filename+".tmp", filename)
+
+
+# Compute a digest of a collection of page inputs
+def Fingerprint(*inputs) -> str:
+    h=hashlib.blake2b(digest_size=16)
+    for x in inputs:
+        h.update(repr(x).encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# The inputs of a mailing page are the template, the mailing (its apazines and Joe's info for it), and the numbers of its neighbours
+def MailingPageFingerprint(template: str, apa: EntireAPA, mailing: OneMailing) -> str:
+    return Fingerprint(template, apa.Name, mailing.Fingerprint(), apa.prevIndex(mailing.Number), apa.nextIndex(mailing.Number))
+
+
+# The inputs of an APA page are the template, the bumpf, and the date, editor and counts of each of its mailings
+# (If the APA's mailings are split over several index pages, each page depends only on the mailings listed on it, and its place among the pages.)
+def ApaPageFingerprint(template: str, bumpf: str | None, apa: EntireAPA, mailings: list[OneMailing] | None=None, page: int=0, pages: int=1) -> str:
+    rows=[(m.Number, str(m.MIFJ.Date), m.MIFJ.Editor, m.Count.Issues, m.Count.Pages) for m in (apa.List if mailings is None else mailings)]
+    if pages == 1:
+        return Fingerprint(template, bumpf, apa.Name, str(apa.Count), rows)
+    return Fingerprint(template, bumpf, apa.Name, str(apa.Count), rows, page, pages)
+
+
+# The inputs of the all-APAs page are the template and the counts for each APA
+def AllApasPageFingerprint(template: str, allAPAs: AllAPAs) -> str:
+    return Fingerprint(template, [(apa.Name, apa.Count.Mailings, apa.Count.Issues, apa.Count.Pages) for apa in allAPAs.List])
+
+
+######################################################################
+# The model's fingerprints, as kept in the build manifest:
+#   {"Fingerprint": <all APAs>, "APAs": {<APA name>: {"Fingerprint": <APA>, "Mailings": {<mailing number>: <mailing>}}}}
+def ModelFingerprints(allAPAs: AllAPAs) -> dict:
+    return {"Fingerprint": allAPAs.Fingerprint(),
+            "APAs": {apa.Name: {"Fingerprint": apa.Fingerprint(), "Mailings": {m.Number: m.Fingerprint() for m in apa}} for apa in allAPAs}}
+
+
+# Compare two runs' model fingerprints.  Only the APAs whose fingerprints differ are looked into.
+# Returns the APAs added and removed, and for each APA which has changed, the mailings added, removed and changed.
+def DiffModels(old: dict, new: dict) -> dict[str, list | dict]:
+    changes: dict[str, list | dict]={"APAs added": [], "APAs removed": [], "Mailings added": {}, "Mailings removed": {}, "Mailings changed": {}}
+    if old.get("Fingerprint") == new["Fingerprint"]:
+        return changes
+
+    oldAPAs=old.get("APAs", {})
+    changes["APAs removed"]=sorted([x for x in oldAPAs if x not in new["APAs"]])
+    for apaName, apa in new["APAs"].items():
+        oldApa=oldAPAs.get(apaName)
+        if oldApa is None:
+            changes["APAs added"].append(apaName)
+            continue
+        if oldApa.get("Fingerprint") == apa["Fingerprint"]:
+            continue
+        oldMailings=oldApa.get("Mailings", {})
+        for key, numbers in [("Mailings added", [x for x in apa["Mailings"] if x not in oldMailings]),
+                             ("Mailings removed", [x for x in oldMailings if x not in apa["Mailings"]]),
+                             ("Mailings changed", [x for x, fp in apa["Mailings"].items() if x in oldMailings and oldMailings[x] != fp])]:
+            if len(numbers) > 0:
+                changes[key][apaName]=numbers
+    return changes
+
+
+# Log a summary of the changes since the last run, and write them all to a JSON file in ReportsDir
+def WriteChangeReport(reportsdir: str, changes: dict[str, list | dict] | None) -> None:
+    if changes is None:
+        Log("No record of the last run, so no report of what has changed since it")
+        return
+    summary=[f"{HelpersPackage.Pluralize(len(changes['APAs '+x]), 'APA')} {x}" for x in ["added", "removed"] if len(changes["APAs "+x]) > 0]
+    summary+=[f"{HelpersPackage.Pluralize(sum([len(y) for y in changes['Mailings '+x].values()]), 'mailing')} {x}"
+              for x in ["added", "removed", "changed"] if len(changes["Mailings "+x]) > 0]
+    Log(f"Changes since the last run: {', '.join(summary) if len(summary) > 0 else 'none'}")
+
+    filename=os.path.join(reportsdir, "FanacMailings changes.json")
+    with open(filename+".tmp", "w", encoding="utf-8") as file:
+        json.dump(changes, file, indent=2)
+    os.replace(filename+".tmp", filename)
 
 
 ######################################################################
 # A class to count mailings, issues and pages
 class Counts:
+    __slots__=("Mailings", "Issues", "Pages")
+
     def __init__(self, Pages: int|str=0, Issues: int=0, Mailings: int=0):
         self.Mailings=Mailings
         self.Issues=Issues
         if type(Pages) is str:
-            Pages=Int0(Pages)
+            Pages=HelpersPackage.Int0(Pages)
         self.Pages=Pages
 
     def __hash__(self):
-        return self.Mailings.__hash__()+self.Pages.__hash__()+self.Issues.__hash__()
+        return hash((self.Mailings, self.Issues, self.Pages))
 
     def __iadd__(self, val:Counts | int):
         self.Add(val)
@@ -493,8 +1355,8 @@ class Counts:
     def __str__(self):
         s=""
         if self.Mailings > 0:
-            s+=f"{Pluralize(self.Mailings, 'mailing')}, "
-        return s+f"{Pluralize(self.Issues, 'issue')}, {Pluralize(self.Pages, 'page')}"
+            s+=f"{HelpersPackage.Pluralize(self.Mailings, 'mailing')}, "
+        return s+f"{HelpersPackage.Pluralize(self.Issues, 'issue')}, {HelpersPackage.Pluralize(self.Pages, 'page')}"
 
     # Add a Count or a single fanzine
     def __add__(self, val:Counts | int) -> Counts:
@@ -520,22 +1382,41 @@ class Counts:
 
 ######################################################################
 # Entry for a specific mailing in a dictionary of mailings for an APA.
+# A mailing Joe has no info on shares the single NoJoeData (below), rather than having an empty one of its own.
 class MailingInfoFromJoe:
+    __slots__=("Number", "Editor", "Prev", "Next", "_date")
+
     def __init__(self, Number: str = "", Year: str = "", Month: str = "", Editor: str = ""):
         self.Number: str=Number
         self.Editor: str=Editor
         self.Prev: str=""
         self.Next: str=""
 
-        fd=FanzineDate()
+        self._date: FanzineDate | None=None
         if Month != "":
-            fd.Month=Month
+            self.Date.Month=Month
         if Year != "":
-            fd.Year=Year
-        self.Date: FanzineDate=fd
+            self.Date.Year=Year
 
     def __hash__(self):
-        return self.Number.__hash__()+self.Editor.__hash__()+self.Prev.__hash__()+self.Next.__hash__()+self.Date.__hash__()
+        return hash((self.Number, self.Editor, self.Prev, self.Next, self.Date))
+
+    # NoJoeData is pickled by name, so that it is still the one shared object when it is unpickled
+    def __reduce_ex__(self, protocol):
+        if self is NoJoeData:
+            return "NoJoeData"
+        return super().__reduce_ex__(protocol)
+
+    # A digest of the info which goes into the pages
+    def Fingerprint(self) -> str:
+        return Fingerprint(self.Number, self.Editor, str(self.Date))
+
+    # (The date is created when first needed, so that NoJoeData can be created without importing FanzineIssueSpecPackage.)
+    @property
+    def Date(self) -> FanzineDate:
+        if self._date is None:
+            self._date=FanzineIssueSpecPackage.FanzineDate()
+        return self._date
 
 
     @property
@@ -555,18 +1436,39 @@ class MailingInfoFromJoe:
         self.Date.Month=m
 # --- end class MailingDev ---
 
+# The info of a mailing which Joe has no info on.  It is shared, so it must never be changed.
+NoJoeData=MailingInfoFromJoe()
+
 
 ######################################################################
+# The model is AllAPAs --> EntireAPA --> OneMailing --> FanzineInMailing.
+# Each level has a Fingerprint(): a digest of its contents, made from the fingerprints of the level below, Merkle-fashion.
+# A fingerprint is computed when first asked for and then cached.  Appending to or re-sorting an object (or replacing a mailing's MIFJ)
+# drops its cached fingerprint and those of the objects which contain it, so only what has changed gets digested again.
+# (The Counts are not part of the fingerprints, as they are computed from the apazines.)
 #
+# Each container is sorted just once: sort() does nothing if nothing has been appended since the last sort.  The sort key of each
+# mailing and apazine is computed the first time it's needed and then kept on it (as SortKey).
+
 class OneMailing:
+    __slots__=("_Count", "_MIFJ", "ListFIM", "PageCounts", "Number", "_sortKey", "_sorted", "_fingerprint", "_owner")
+
     def __init__(self):
         self._Count: Counts=Counts()      # The totals for all the apazines in the mailing
-        self.MIFJ: MailingInfoFromJoe=MailingInfoFromJoe()       # Joe's info on the mailing
+        self._MIFJ: MailingInfoFromJoe=NoJoeData       # Joe's info on the mailing
         self.ListFIM: list=[]        # A list of all the apazines in the mailing
+        self.PageCounts: array=array("i")      # The page count of each apazine in ListFIM, for totalling
         self.Number: str=""        # The name of the mailing (usually a number.)
+        self._sortKey: float | None=None
+        self._sorted: bool=True
+        self._fingerprint: str | None=None
+        self._owner: EntireAPA | None=None     # The APA this mailing belongs to
 
     def append(self, val: FanzineInMailing):
         self.ListFIM.append(val)
+        self.PageCounts.append(val.Pages)
+        self._sorted=False
+        self._Changed()
 
     def __str__(self) -> str:
         return self.Number
@@ -575,23 +1477,49 @@ class OneMailing:
     def __len__(self):
         return len(self.ListFIM)
     def __hash__(self):
-        h=self.Number.__hash__()+self.Count.__hash__()+self.MIFJ.__hash__()
-        for lf in self.ListFIM:
-            h+=lf.__hash__()
-        return h
+        return hash(self.Fingerprint())
 
-    def __iter__(self):
-        self._current=0
-        return self
+    # A mailing is pickled (e.g., to be sent to a worker process) without its link to its APA, which would drag along all the APAs
+    def __getstate__(self) -> dict:
+        return {x: getattr(self, x) for x in OneMailing.__slots__} | {"_owner": None}
+
+    def __setstate__(self, state: dict):
+        for name, value in state.items():
+            setattr(self, name, value)
 
-    def __next__(self):
-        if self._current >= len(self.ListFIM):
-            raise StopIteration
-        self._current += 1
-        return self.ListFIM[self._current-1]
+    def Fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint=Fingerprint(self.Number, self.MIFJ.Fingerprint(), [x.Fingerprint() for x in self.ListFIM])
+        return self._fingerprint
+
+    # Forget the fingerprints of this mailing and of everything containing it
+    # (If this mailing's fingerprint isn't cached, its containers' can't be either.)
+    def _Changed(self) -> None:
+        if self._fingerprint is not None:
+            self._fingerprint=None
+            if self._owner is not None:
+                self._owner._Changed()
+
+    # Each iteration gets its own iterator, so a mailing can be walked by more than one loop at a time
+    def __iter__(self) -> Iterator[FanzineInMailing]:
+        return iter(self.ListFIM)
 
     def sort(self):
-        self.ListFIM.sort(key=lambda x: SortTitle(x.IssueName))
+        if self._sorted:
+            return
+        self._sorted=True
+        listFIM=sorted(self.ListFIM, key=operator.attrgetter("SortKey"))
+        if any([x is not y for x, y in zip(listFIM, self.ListFIM)]):
+            self.ListFIM[:]=listFIM
+            self.PageCounts=array("i", [x.Pages for x in self.ListFIM])
+            self._Changed()
+
+    # The key the mailings of an APA are sorted by
+    @property
+    def SortKey(self):
+        if self._sortKey is None:
+            self._sortKey=SortMessyNumber(self.Number)
+        return self._sortKey
 
     @property
     def Count(self):
@@ -600,121 +1528,238 @@ class OneMailing:
     def Count(self, val):
         self._Count=val
 
+    @property
+    def MIFJ(self) -> MailingInfoFromJoe:
+        return self._MIFJ
+    @MIFJ.setter
+    def MIFJ(self, val: MailingInfoFromJoe):
+        self._MIFJ=val
+        self._Changed()
+
 
 
+# The mailings of a single APA
+# The mailings are kept in an ordered list, alongside a dict indexing them by mailing number so that lookup is O(1).
+# The ordinal position of each mailing (used to find its neighbours) is computed lazily and is only rebuilt after the list changes order.
 @dataclass
 class EntireAPA:
     Count: Counts=field(default_factory=lambda: Counts())
     List: list[OneMailing]=field(default_factory=list)
     Name: str=""
+    _index: dict[str, OneMailing]=field(default_factory=dict, init=False, repr=False, compare=False)
+    _ordinal: dict[str, int] | None=field(default=None, init=False, repr=False, compare=False)
+    _sorted: bool=field(default=False, init=False, repr=False, compare=False)
+    _fingerprint: str | None=field(default=None, init=False, repr=False, compare=False)
+    _owner: AllAPAs | None=field(default=None, init=False, repr=False, compare=False)     # The AllAPAs this APA belongs to
+
+    def __post_init__(self):
+        for om in self.List:
+            self._index.setdefault(om.Number, om)
+            om._owner=self
 
     def __hash__(self):
-        h=0
+        return hash(self.Fingerprint())
+
+    # An APA is pickled without a link to the AllAPAs it is in.  Its mailings are linked back to it when it is unpickled.
+    def __getstate__(self) -> dict:
+        return self.__dict__ | {"_owner": None}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
         for om in self.List:
-            h+=om.__hash__()
-        return h+self.Name.__hash__()+self.Count.__hash__()
+            om._owner=self
+
+    def Fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint=Fingerprint(self.Name, [(x.Number, x.Fingerprint()) for x in self.List])
+        return self._fingerprint
+
+    def _Changed(self) -> None:
+        if self._fingerprint is not None:
+            self._fingerprint=None
+            if self._owner is not None:
+                self._owner._Changed()
 
     def __len__(self) -> int:
         return len(self.List)
 
     def append(self, val:OneMailing):
         self.List.append(val)
+        self._index.setdefault(val.Number, val)
+        self._ordinal=None
+        self._sorted=False
+        val._owner=self
+        self._Changed()
+
+    # Get a mailing by number, creating it if it doesn't yet exist
     def __getitem__(self, index: str) -> OneMailing:
-        for (i, x) in enumerate(self.List):
-            if x.Number == index:
-                return x
-        new=OneMailing()
-        new.Number=index
-        self.List.append(new)
-        return new
+        mailing=self._index.get(index)
+        if mailing is None:
+            mailing=OneMailing()
+            mailing.Number=index
+            self.append(mailing)
+        return mailing
+
+    # The position in List of each mailing, indexed by mailing number
+    @property
+    def Ordinal(self) -> dict[str, int]:
+        if self._ordinal is None:
+            self._ordinal={}
+            for (i, x) in enumerate(self.List):
+                self._ordinal.setdefault(x.Number, i)
+        return self._ordinal
 
     def nextIndex(self, index: str) -> str | None:
-        for (i, x) in enumerate(self.List):
-            if x.Number == index:
-                if i+1 >= len(self.List):
-                    return None
-                return self.List[i+1].Number
-        return None
+        i=self.Ordinal.get(index)
+        if i is None or i+1 >= len(self.List):
+            return None
+        return self.List[i+1].Number
 
     def prevIndex(self, index: str) -> str|None:
-        for (i, x) in enumerate(self.List):
-            if x.Number == index:
-                if i-1 < 0:
-                    return None
-                return self.List[i-1].Number
-        return None
-
-    def __iter__(self):
-        self._current=0
-        return self
+        i=self.Ordinal.get(index)
+        if i is None or i-1 < 0:
+            return None
+        return self.List[i-1].Number
 
-    def __next__(self):
-        if self._current >= len(self.List):
-            raise StopIteration
-        self._current += 1
-        return self.List[self._current-1]
+    def __iter__(self) -> Iterator[OneMailing]:
+        return iter(self.List)
 
     def sort(self):
-        self.List.sort(key=lambda x: SortMessyNumber(x.Number))
+        if self._sorted:
+            return
+        self._sorted=True
+        mailings=sorted(self.List, key=operator.attrgetter("SortKey"))
+        if any([x is not y for x, y in zip(mailings, self.List)]):
+            self.List[:]=mailings
+            self._ordinal=None
+            self._Changed()
 
 
+# All the APAs, kept in an ordered list alongside a dict indexing them by name
+# Editors is an inverted index of all the apazines: normalized editor name --> [(APA name, mailing, apazine), ...]
 @dataclass
 class AllAPAs:
     Count: Counts=field(default_factory=lambda: Counts())
     List: list[EntireAPA]=field(default_factory=list)
+    Editors: dict[str, list[tuple[str, OneMailing, FanzineInMailing]]]=field(default_factory=dict, repr=False, compare=False)
+    _index: dict[str, EntireAPA]=field(default_factory=dict, init=False, repr=False, compare=False)
+    _sorted: bool=field(default=False, init=False, repr=False, compare=False)
+    _fingerprint: str | None=field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        for apa in self.List:
+            self._index.setdefault(apa.Name, apa)
+            apa._owner=self
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        for apa in self.List:
+            apa._owner=self
+
+    def Fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint=Fingerprint([(x.Name, x.Fingerprint()) for x in self.List])
+        return self._fingerprint
+
+    def _Changed(self) -> None:
+        self._fingerprint=None
 
     def append(self, val:EntireAPA):
         self.List.append(val)
+        self._index.setdefault(val.Name, val)
+        self._sorted=False
+        val._owner=self
+        self._Changed()
 
+    # Get an APA by name, creating it if it doesn't yet exist
     def __getitem__(self, index: str) -> EntireAPA:
-        for (i, x) in enumerate(self.List):
-            if x.Name == index:
-                return x
-        new=EntireAPA()
-        new.Name=index
-        self.List.append(new)
-        return new
-
-    def __iter__(self):
-        self._current=0
-        return self
-
-    def __next__(self):
-        if self._current >= len(self.List):
-            raise StopIteration
+        apa=self._index.get(index)
+        if apa is None:
+            apa=EntireAPA()
+            apa.Name=index
+            self.append(apa)
+        return apa
 
-        self._current += 1
-        return self.List[self._current-1]
+    def __iter__(self) -> Iterator[EntireAPA]:
+        return iter(self.List)
 
     def sort(self):
-        self.List.sort(key=lambda x: x.Name)
+        if self._sorted:
+            return
+        self._sorted=True
+        apas=sorted(self.List, key=lambda x: x.Name)
+        if any([x is not y for x, y in zip(apas, self.List)]):
+            self.List[:]=apas
+            self._Changed()
 
 
 ######################################################################
 # A class to hold the information for one fanzine in one mailing of an APA
+# There is one of these for every row of the FanacAnalyzer CSV, so it uses __slots__ to keep it compact
 
 class FanzineInMailing:
-    def __init__(self, headers: list[str], row: list[str]):
-        self.IssueName: str=self.initialize(headers, row, "IssueName")
-        self.Series: str=self.initialize(headers, row, "Series")
-        self.SeriesName: str=self.initialize(headers, row, "SeriesName")
-        self.DisplayName: str=self.initialize(headers, row, "DisplayName")
-        self.DirURL: str=self.initialize(headers, row, "DirURL")
-        self.PageName: str=self.initialize(headers, row, "PageName")
-        self.FIS: str=self.initialize(headers, row, "FIS")
-        self.Locale: str=self.initialize(headers, row, "Locale")
-        self.PageCount: str=self.initialize(headers, row, "PageCount")
-        self.Editor: str=self.initialize(headers, row, "Editor")
-        self.TagList: str=self.initialize(headers, row, "TagList")
-        self.Mailings: str=self.initialize(headers, row, "Mailings")
+    # The CSV columns we keep, in the order the constructor takes them
+    Columns=("IssueName", "Series", "SeriesName", "DisplayName", "DirURL", "PageName", "FIS", "Locale", "PageCount", "Editor", "TagList", "Mailings")
+    __slots__=Columns+("Pages", "_sortKey", "_fingerprint")
+    # The columns whose values repeat from row to row (the same editor, series, directory, ...), and are interned as they are read
+    # so that each distinct value is stored just once
+    Interned=("Series", "SeriesName", "DirURL", "Locale", "PageCount", "Editor", "TagList", "Mailings")
+
+    def __init__(self, IssueName: str="", Series: str="", SeriesName: str="", DisplayName: str="", DirURL: str="", PageName: str="",
+                 FIS: str="", Locale: str="", PageCount: str="", Editor: str="", TagList: str="", Mailings: str=""):
+        self.IssueName: str=IssueName
+        self.Series: str=Series
+        self.SeriesName: str=SeriesName
+        self.DisplayName: str=DisplayName
+        self.DirURL: str=DirURL
+        self.PageName: str=PageName
+        self.FIS: str=FIS
+        self.Locale: str=Locale
+        self.PageCount: str=PageCount
+        self.Editor: str=Editor
+        self.TagList: str=TagList
+        self.Mailings: str=Mailings
+        self.Pages: int=HelpersPackage.Int0(PageCount)     # The page count as a number (parsed just once, here)
+        self._sortKey: str | None=None
+        self._fingerprint: str | None=None
+
+    # The key the apazines of a mailing are sorted by
+    @property
+    def SortKey(self) -> str:
+        if self._sortKey is None:
+            self._sortKey=HelpersPackage.SortTitle(self.IssueName)
+        return self._sortKey
+
 
+    # A digest of the columns.  (A FanzineInMailing is not changed once it has been read, so this is computed just once.)
+    def Fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint=Fingerprint(*[getattr(self, x) for x in FanzineInMailing.Columns])
+        return self._fingerprint
 
+    # Return a function which turns a row of the CSV into a FanzineInMailing
+    # The columns are located in the header row just once, rather than being looked up again for every row
     @staticmethod
-    def initialize(headers: list[str], row: list[str], item: str) -> str:
-        index=FindIndexOfStringInList(headers, item)
-        if index == -1:
-            return ""
-        return row[index]
+    def RowFactory(headers: list[str]) -> Callable[[list[str]], FanzineInMailing]:
+        width=len(headers)
+        indexes=[]
+        for column in FanzineInMailing.Columns:
+            index=HelpersPackage.FindIndexOfStringInList(headers, column)
+            if index is None or index < 0:
+                index=width     # A missing column reads the empty string padded onto the end of each row
+            indexes.append(index)
+        getter=operator.itemgetter(*indexes)
+        padding=[""]*(width+1)
+        interned=[FanzineInMailing.Columns.index(x) for x in FanzineInMailing.Interned]
+
+        def MakeFanzine(row: list[str]) -> FanzineInMailing:
+            if len(row) > width:
+                row=row[:width]
+            values=list(getter(row+padding[len(row):]))
+            for i in interned:
+                values[i]=sys.intern(values[i])
+            return FanzineInMailing(*values)
+        return MakeFanzine
 
 # --- end class FanzineInMailing ---
 
@@ -722,6 +1767,7 @@ class FanzineInMailing:
 # Run main()
 if __name__ == "__main__":
     main()
+    LogQueueStop()
     LogDisplayErrorsIfAny()
 
 
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+
+from LazyImport import LazyModule
+
+gzip=LazyModule("gzip")       # Only needed if pages are being compressed
+
+
+######################################################################
+# Gzipped copies of the generated pages, written next to them (index.html --> index.html.gz), for a web server which can serve
+# precompressed files (e.g., nginx's gzip_static) rather than compressing the page again on every request.
+#
+# The .gz files are reproducible: the gzip header's mtime is fixed at 0 and it names no file, and the compression level is fixed,
+# so the same page always compresses to the same bytes.
+#
+# GzipPage() queues a page which has just been written to be compressed by a background thread, so the compression overlaps
+# the rendering of the pages which follow it.  Each process which writes pages has its own thread, started when it is first needed.
+# RemoveGzip() deletes the .gz of a page which is no longer being compressed.
+# GzipPagesFinish() waits until everything queued in the process has been written, and returns the .gz files which were written and deleted,
+# so that they can go into the delta, and the pages which couldn't be compressed.  (It doesn't log those itself, since it may be in
+# a worker process whose log the user never sees.)
+
+GzipLevel=9
+
+
+# What has happened to the .gz files of the pages since GzipPagesFinish() was last called.  (Each is listed by its page's filename.)
+@dataclass
+class GzipResults:
+    Written: list[tuple[str, bool]]=field(default_factory=list)    # (filename, whether its .gz was already there) for each .gz written
+    Deleted: list[str]=field(default_factory=list)                 # The pages whose .gz was deleted
+    Failed: list[tuple[str, str]]=field(default_factory=list)      # (filename, error message) for each page which couldn't be compressed
+
+
+class _GzipState:
+    def __init__(self):
+        self.Queue: queue.Queue | None=None
+        self.Thread: threading.Thread | None=None
+        self.Pid: int=0                     # The process the thread belongs to
+        self.Lock: threading.Lock=threading.Lock()      # Held while the thread is started, since pages are written from several threads
+        self.Results: GzipResults=GzipResults()
+
+_state=_GzipState()
+
+
+# Queue the page file filename to be compressed to filename.gz
+def GzipPage(filename: str) -> None:
+    with _state.Lock:
+        if not _Running():
+            _state.Queue=queue.Queue()
+            _state.Pid=os.getpid()
+            _state.Thread=threading.Thread(target=_Compressor, args=(_state.Queue,), name="GzipPages", daemon=True)
+            _state.Thread.start()
+        _state.Queue.put(filename)
+
+
+# Delete the .gz of the page file filename, if it has one
+def RemoveGzip(filename: str) -> None:
+    if os.path.exists(filename+".gz"):
+        os.remove(filename+".gz")
+        _state.Results.Deleted.append(filename)
+
+
+# Wait for the pages queued so far to be compressed, and return what has happened to the .gz files since the last call
+def GzipPagesFinish() -> GzipResults:
+    if _Running():
+        _state.Queue.join()
+    results, _state.Results=_state.Results, GzipResults()
+    return results
+
+
+def GzipBytes(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=GzipLevel, mtime=0)
+
+
+# Is the compressor thread running in this process?  (A forked worker process inherits the state, but not the thread.)
+def _Running() -> bool:
+    return _state.Thread is not None and _state.Pid == os.getpid()
+
+
+def _Compressor(work: queue.Queue) -> None:
+    while True:
+        filename=work.get()
+        try:
+            with open(filename, "rb") as file:
+                data=GzipBytes(file.read())
+            with open(filename+".gz.tmp", "wb") as file:
+                file.write(data)
+            existed=os.path.exists(filename+".gz")
+            os.replace(filename+".gz.tmp", filename+".gz")
+            _state.Results.Written.append((filename, existed))
+        except OSError as e:
+            _state.Results.Failed.append((filename, f"Could not write {filename}.gz: {e}"))
+            # The old .gz is out of date, and would otherwise be taken to be good next time
+            try:
+                RemoveGzip(filename)
+            except OSError:
+                pass
+        finally:
+            work.task_done()
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+######################################################################
+# Deferred imports, for the packages which are slow to import and which not every run needs.  (E.g., openpyxl is only needed
+# when Joe's spreadsheet has changed since it was last cached.)
+#
+# LazyModule(name) returns the module at once, but it isn't actually executed until one of its attributes is first used.
+# So its users must refer to its contents through it (module.Function()), since "from module import Function" would load it there and then.
+# A module which has already been imported is simply returned.
+def LazyModule(name: str) -> ModuleType:
+    module=sys.modules.get(name)
+    if module is not None:
+        return module
+    spec=importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader=importlib.util.LazyLoader(spec.loader)
+    spec.loader=loader
+    module=importlib.util.module_from_spec(spec)
+    sys.modules[name]=module
+    loader.exec_module(module)
+    return module
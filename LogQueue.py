@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import threading
+
+import Log as LogPackage
+
+
+######################################################################
+# A leveled front end to the Log package which takes the writing of the log off the main thread.
+#
+# Once LogQueueStart() has been called, Log() just puts its line on a queue and a background thread does the writing,
+# so a busy loop never waits on the disk.  Until then (and in worker processes) Log() writes directly, as the Log package does.
+#
+# LogDebug() lines are tagged with a category.  They are dropped unless the level is Debug, and each category can be sampled
+# (only every Nth line is kept) or suppressed entirely.  The number dropped in each category is logged when the queue is stopped.
+#
+# LogError() is never queued: it waits for the lines already queued to be written, and then calls the Log package's LogError() directly,
+# so errors always reach log-ERRORS.txt (and LogDisplayErrorsIfAny()) in order.
+#
+# Call LogQueueStop() before LogDisplayErrorsIfAny().  (It is also called at exit, in case a run ends early.)
+
+Debug=10
+Info=20
+Error=40
+LevelNames={"debug": Debug, "info": Info, "error": Error}
+
+
+class _LogQueueState:
+    def __init__(self):
+        self.Level: int=Info
+        self.Sampling: dict[str, int]={}    # Category --> keep every Nth line (0 means keep none)
+        self.Seen: dict[str, int]={}        # Category --> debug lines logged so far
+        self.Queue: queue.Queue | None=None
+        self.Thread: threading.Thread | None=None
+        self.Pid: int=0                     # The process which started the queue
+        self.Lock: threading.Lock=threading.Lock()      # Held while anything is being written to the log
+
+_state=_LogQueueState()
+
+
+# Start the background writer.  sampling maps debug categories to N, meaning keep every Nth line, or 0, meaning keep none.
+def LogQueueStart(level: int=Info, sampling: dict[str, int] | None=None) -> None:
+    _state.Level=level
+    _state.Sampling=sampling if sampling is not None else {}
+    _state.Seen={}
+    if _state.Thread is not None:
+        return
+    _state.Queue=queue.Queue()
+    _state.Pid=os.getpid()
+    _state.Thread=threading.Thread(target=_Writer, name="LogQueue", daemon=True)
+    _state.Thread.start()
+    atexit.register(LogQueueStop)
+
+
+# Write out everything queued and stop the background writer
+def LogQueueStop() -> None:
+    if not _Running():
+        return
+    dropped={category: seen-_Kept(category, seen) for category, seen in _state.Seen.items()}
+    for category, count in sorted(dropped.items()):
+        if count > 0:
+            Log(f"{count} '{category}' debug lines were not logged")
+    _state.Queue.put(None)
+    _state.Thread.join()
+    _state.Thread=None
+    _state.Queue=None
+
+
+def Log(text: str) -> None:
+    if _state.Level > Info:
+        return
+    if _Running():
+        _state.Queue.put(text)
+    elif _state.Pid == 0 or _state.Pid == os.getpid():
+        with _state.Lock:
+            LogPackage.Log(text)
+    # Otherwise this is a worker process forked from the one with the queue, and the line is dropped
+
+
+def LogDebug(category: str, text: str) -> None:
+    if _state.Level > Debug:
+        return
+    seen=_state.Seen.get(category, 0)
+    _state.Seen[category]=seen+1
+    every=_state.Sampling.get(category, 1)
+    if every == 0 or seen % every != 0:
+        return
+    Log(text)
+
+
+def LogError(text: str) -> None:
+    if _Running():
+        _state.Queue.join()     # Make sure everything logged before the error is written before it
+    with _state.Lock:
+        LogPackage.LogError(text)
+
+
+# Parse a sampling setting of the form "category=N, category=N, ..."
+def ParseSampling(text: str) -> dict[str, int]:
+    sampling={}
+    for item in text.split(","):
+        if "=" in item:
+            category, every=item.split("=", 1)
+            try:
+                sampling[category.strip()]=max(0, int(every))
+            except ValueError:
+                LogError(f"Log sampling '{item.strip()}' should be of the form category=N")
+    return sampling
+
+
+# Is the background writer running in this process?  (A forked worker process inherits the state, but not the thread.)
+def _Running() -> bool:
+    return _state.Thread is not None and _state.Pid == os.getpid()
+
+
+# The number of the first 'seen' debug lines in a category which are kept
+def _Kept(category: str, seen: int) -> int:
+    every=_state.Sampling.get(category, 1)
+    if every == 0:
+        return 0
+    return (seen+every-1)//every
+
+
+def _Writer() -> None:
+    while True:
+        text=_state.Queue.get()
+        try:
+            if text is None:
+                return
+            with _state.Lock:
+                LogPackage.Log(text)
+        except Exception:
+            pass        # A line which can't be written is lost, but the writer carries on
+        finally:
+            _state.Queue.task_done()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+import itertools
+import re
+
+
+######################################################################
+# A page template which has been compiled into literal segments and named slots.
+# The template file is parsed just once.  Rendering a page then only fills in the slots and joins the segments.
+#
+# A template is compiled by calling a series of methods, each of which turns some of the remaining literal text into a slot:
+#   ReplaceTag(tag, slot)                   The first <tag>...</tag> (tags included) becomes the slot
+#   ReplaceInTag(tag, {text: slot, ...})    Within the first <tag>...</tag>, each occurrence of text becomes its slot.  The tags are dropped unless keepTags is True.
+#   ReplaceText(text, slot)                 Every occurrence of text becomes the slot
+# A slot which is not given a value when the page is rendered gets the template text it replaced.
+# If a required tag or text can't be found, it is listed in Missing.  (Check that once the template is compiled.)
+class PageTemplate:
+    def __init__(self, text: str):
+        self.Text: str=text             # The template as read from the file
+        self.Missing: list[str]=[]      # The required tags and text that could not be found
+        self._items: list[str | Slot]=[text]
+        self._parts: list[str]=[text]   # The segments, with each slot holding its default text
+        self._positions: dict[str, list[int]]={}    # Slot name --> indexes of that slot in _parts
+
+
+    def ReplaceTag(self, tag: str, slot: str, required: bool=True) -> bool:
+        for i, item, m in self._FindTag(tag):
+            self._items[i:i+1]=[item[:m.start()], Slot(slot, m.group(0)), item[m.end():]]
+            self._Freeze()
+            return True
+        return self._NotFound(f"<{tag}>", required)
+
+
+    def ReplaceInTag(self, tag: str, replacements: dict[str, str], keepTags: bool=False, required: bool=True) -> bool:
+        for i, item, m in self._FindTag(tag):
+            inner: list[str | Slot]=[m.group(2)]
+            for text, slot in replacements.items():
+                inner=self._Split(inner, text, slot)
+            if keepTags:
+                inner=[m.group(1)]+inner+[m.group(3)]
+            self._items[i:i+1]=[item[:m.start()]]+inner+[item[m.end():]]
+            self._Freeze()
+            return True
+        return self._NotFound(f"<{tag}>", required)
+
+
+    def ReplaceText(self, text: str, slot: str, required: bool=True) -> bool:
+        items=self._Split(self._items, text, slot)
+        if len(items) == len(self._items):
+            return self._NotFound(f"'{text}'", required)
+        self._items=items
+        self._Freeze()
+        return True
+
+
+    # Fill in the slots and return the page
+    # Slots not given a value keep the text they replaced, and values for slots this template doesn't have (because they are optional) are ignored.
+    def Render(self, **values: str) -> str:
+        parts=self._parts.copy()
+        for name, value in values.items():
+            for i in self._positions.get(name, ()):
+                parts[i]=value
+        return "".join(parts)
+
+
+    def __contains__(self, slot: str) -> bool:
+        return slot in self._positions
+
+
+    # Find the first occurrence of <tag>...</tag> lying entirely within one literal segment
+    def _FindTag(self, tag: str):
+        pattern=re.compile(rf"(<{re.escape(tag)}(?:\s[^>]*)?>)(.*?)(</{re.escape(tag)}>)", re.DOTALL)
+        for i, item in enumerate(self._items):
+            if type(item) is str:
+                m=pattern.search(item)
+                if m is not None:
+                    yield i, item, m
+                    return
+
+
+    # Split every literal segment in items on text, putting the slot between the pieces
+    @staticmethod
+    def _Split(items: list[str | Slot], text: str, slot: str) -> list[str | Slot]:
+        result=[]
+        for item in items:
+            if type(item) is not str or text not in item:
+                result.append(item)
+                continue
+            pieces=item.split(text)
+            result.append(pieces[0])
+            for piece in pieces[1:]:
+                result.append(Slot(slot, text))
+                result.append(piece)
+        return result
+
+
+    def _NotFound(self, what: str, required: bool) -> bool:
+        if required:
+            self.Missing.append(what)
+        return False
+
+
+    def _Freeze(self) -> None:
+        self._items=[x for x in self._items if x != ""]
+        self._parts=[]
+        self._positions={}
+        for item in self._items:
+            if type(item) is Slot:
+                self._positions.setdefault(item.Name, []).append(len(self._parts))
+                self._parts.append(item.Default)
+            else:
+                self._parts.append(item)
+
+
+# A named hole in a template, along with the text it replaced
+class Slot:
+    __slots__=("Name", "Default")
+
+    def __init__(self, name: str, default: str):
+        self.Name: str=name
+        self.Default: str=default
+
+
+######################################################################
+# Builds an HTML table (or any other long run of text) by collecting its fragments and joining them once at the end,
+# rather than by repeatedly concatenating onto an ever-growing string.
+# The table's columns are fixed when the builder is created, and each row is rendered with a single precompiled format.
+class TableBuilder:
+    # styles is the style of each column's <td> ("" for none); every row has one cell per column
+    def __init__(self, styles: list[str], rowStart: str="<tr>\n", rowEnd: str="</tr>\n", cellEnd: str="\n"):
+        def Literal(text: str) -> str:
+            return text.replace("{", "{{").replace("}", "}}")
+        cells=[("<td>" if style == "" else f"<td style='{Literal(style)}'>")+"{}</td>"+Literal(cellEnd) for style in styles]
+        self._rowFormat: Callable[..., str]=(Literal(rowStart)+"".join(cells)+Literal(rowEnd)).format
+        self._fragments: list[str]=[]
+
+    # Add literal text
+    def Add(self, *text: str) -> None:
+        self._fragments.extend(text)
+
+    # Add a row, given the contents of each of its cells
+    def Row(self, *cells) -> None:
+        self._fragments.append(self._rowFormat(*cells))
+
+    # Add many rows, each given as a tuple of the contents of its cells
+    # (This is the way to add a large table, as it costs no Python-level call per row.)
+    def Rows(self, rows: Iterable[Sequence]) -> None:
+        self._fragments.extend(itertools.starmap(self._rowFormat, rows))
+
+    def Text(self) -> str:
+        return "".join(self._fragments)
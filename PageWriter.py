@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import queue
+import re
+import threading
+
+from GzipPages import GzipPage, RemoveGzip
+
+
+######################################################################
+# Writing the generated pages.
+#
+# WritePage() writes a page in a single call to a temporary file, which is then renamed over the page, so anyone reading ReportsDir
+# (a browser, the upload to fanac.org) sees either the old page or the new one, never a partly-written one, even if the run is interrupted.
+#
+# PageWriter is a writing stage for the render loop: the loop Write()s each page as it is finished and carries on rendering while
+# the writer threads put it on disk.  The queue between them is bounded, so if the disk falls behind the loop waits rather than
+# piling up rendered pages in memory.  Close() waits for the pages to be written and returns what happened to each.
+# The writer doesn't log the errors itself, but returns them, since it may be in a worker process whose log the user never sees.
+
+# The Updated timestamp which each page carries (in its fanac-updated slot)
+UpdatedFormat="Updated %m/%d/%Y, %H:%M:%S"
+UpdatedPattern=re.compile(r"Updated \d\d/\d\d/\d{4}, \d\d:\d\d:\d\d")
+
+
+# Write a page (and, if compress is True, queue it to be gzipped, or else delete its old .gz).  Returns the number of bytes written.
+# If the page already there is the same apart from its Updated timestamp, it is left alone (so it can be recognized as unchanged
+# when the pages are uploaded), and None is returned.  Its .gz is still good, too.
+def WritePage(filename: str, page: str, compress: bool=False) -> int | None:
+    old=ReadPage(filename)
+    # (The timestamp is always the same length, so a page of a different length has changed.)
+    if old is not None and len(old) == len(page) and UpdatedPattern.sub("", old) == UpdatedPattern.sub("", page):
+        if compress and not os.path.exists(filename+".gz"):
+            GzipPage(filename)
+        return None
+    with open(filename+".tmp", "w") as file:
+        file.write(page)
+        written=file.tell()
+    os.replace(filename+".tmp", filename)
+    if compress:
+        GzipPage(filename)
+    else:
+        RemoveGzip(filename)       # A .gz left from an earlier run with compression would now be out of date
+    return written
+
+
+# The text of an existing page, or None if there isn't one
+def ReadPage(filename: str) -> str | None:
+    try:
+        with open(filename, "r") as file:
+            return file.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+class PageWriter:
+    def __init__(self, compress: bool=False, threads: int=2, queueSize: int=32):
+        self._compress: bool=compress
+        self._queue: queue.Queue=queue.Queue(maxsize=queueSize)
+        self._results: list[tuple[str, int | None]]=[]      # (path, what WritePage() returned) for each page written
+        self._failed: list[tuple[str, str]]=[]      # (path, error message) for each page which couldn't be written
+        self._threads: list[threading.Thread]=[threading.Thread(target=self._Writer, name="PageWriter", daemon=True) for _ in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    # Queue a page to be written to filename.  path is what the page is called in the results.
+    # (This waits if the queue is full.)
+    def Write(self, path: str, filename: str, page: str) -> None:
+        self._queue.put((path, filename, page))
+
+    # Wait for all the pages to be written.  Returns (path, what WritePage() returned) for each page written,
+    # and (path, error message) for each page which couldn't be written.
+    def Close(self) -> tuple[list[tuple[str, int | None]], list[tuple[str, str]]]:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return self._results, self._failed
+
+    def _Writer(self) -> None:
+        while True:
+            item=self._queue.get()
+            if item is None:
+                return
+            path, filename, page=item
+            try:
+                self._results.append((path, WritePage(filename, page, self._compress)))
+            except Exception as e:     # (Anything which escaped would kill the thread and leave Write() waiting for it.)
+                self._failed.append((path, f"Could not write {filename}: {e}"))
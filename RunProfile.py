@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import cProfile
+import datetime
+import json
+import os
+import time
+
+from LogQueue import Log
+
+
+######################################################################
+# Profiling of a run of FanacMailings: the wall and CPU time of each phase of the run, plus counters of how much work was done.
+# The results are saved as a JSON run report.
+#
+# A run is divided into phases by calling Phase(name) as each one starts; the previous phase ends there.
+# When profiling is off every method returns at once, so the instrumentation can be left in the main line of the program.
+class RunProfile:
+    def __init__(self, enabled: bool=False, cprofile: bool=False):
+        self.Enabled: bool=enabled
+        self.CProfile: bool=cprofile        # Also profile the render loop using cProfile?
+        self.Phases: dict[str, dict[str, float]]={}     # Phase name --> {"Wall": seconds, "CPU": seconds}
+        self.Counters: dict[str, int | dict[str, int]]={}
+        self._started: datetime.datetime=datetime.datetime.now()
+        self._phase: str | None="Startup"
+        self._wall: float=time.perf_counter()
+        self._cpu: float=time.process_time()
+        self._profiler: cProfile.Profile | None=None
+
+    # Turn profiling on part way through a run.  (The phase underway is still timed from its start.)
+    def Enable(self, cprofile: bool=False) -> None:
+        self.Enabled=True
+        self.CProfile=self.CProfile or cprofile
+
+
+    # End the current phase and start the next.  A phase which is entered more than once has its times summed.
+    def Phase(self, name: str | None) -> None:
+        if not self.Enabled:
+            return
+        wall=time.perf_counter()
+        cpu=time.process_time()
+        if self._phase is not None:
+            times=self.Phases.setdefault(self._phase, {"Wall": 0.0, "CPU": 0.0})
+            times["Wall"]+=wall-self._wall
+            times["CPU"]+=cpu-self._cpu
+        self._phase=name
+        self._wall=wall
+        self._cpu=cpu
+
+
+    # Set a counter (or a table of counters)
+    def Set(self, name: str, value: int | dict[str, int]) -> None:
+        if not self.Enabled:
+            return
+        self.Counters[name]=value
+
+
+    # Start and stop profiling the render loop with cProfile.  The statistics are dumped to filename, for use with pstats or snakeviz.
+    def StartCProfile(self) -> None:
+        if not self.Enabled or not self.CProfile:
+            return
+        self._profiler=cProfile.Profile()
+        self._profiler.enable()
+
+    def StopCProfile(self, filename: str) -> None:
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        self._profiler.dump_stats(filename)
+        self._profiler=None
+        Log(f"Render loop profile written to {filename}")
+
+
+    # End the last phase and write the run report
+    def Save(self, filename: str, **details) -> None:
+        if not self.Enabled:
+            return
+        self.Phase(None)
+        report={"Started": self._started.isoformat(timespec="seconds"),
+                **details,
+                "Total": {"Wall": sum([x["Wall"] for x in self.Phases.values()]), "CPU": sum([x["CPU"] for x in self.Phases.values()])},
+                "Phases": self.Phases,
+                "Counters": self.Counters}
+        with open(filename+".tmp", "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        os.replace(filename+".tmp", filename)
+        Log(f"Run report written to {filename}")